@@ -1,9 +1,11 @@
 import os
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Import modules from src
-from src import youtube, ai, tts, email_sender, storage, database, config_manager, test_utils
+from src import youtube, ai, tts, audio, email_sender, storage, database, config_manager, pipeline, batch, scheduler
 
 # Load environment variables
 load_dotenv()
@@ -12,155 +14,477 @@ load_dotenv()
 # MAIN LOGIC
 # ---------------------------------------------------------
 
-def run_monitor(gen_conf, proj_conf):
-    # Initialize DB
+def fetch_all_feeds(subscriptions, limit, max_workers, feed_cache=None):
+    """
+    Fetches the RSS feeds of all subscriptions concurrently.
+    Returns a list of video lists in the same order as `subscriptions`.
+    With `feed_cache` (conditional requests), an entry is None if the feed was not modified
+    or could not be fetched; failed feeds keep their cached ETag/Last-Modified.
+    """
+    channel_ids = [sub['channel_id'] for sub in subscriptions]
+    if not channel_ids:
+        return []
+
+    def fetch(channel_id):
+        try:
+            if feed_cache is None:
+                return youtube.get_new_videos(channel_id, limit=limit)
+            cache = feed_cache.setdefault(channel_id, {})
+            return youtube.get_new_videos(channel_id, limit=limit, cache=cache)
+        except Exception as e:
+            print(f"Error fetching feed for {channel_id}: {e}")
+            # Handled like an unmodified feed, so the validators are not overwritten
+            return None if feed_cache is not None else []
+
+    workers = max(1, min(max_workers, len(channel_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() keeps the subscription order, so processing stays deterministic
+        return list(executor.map(fetch, channel_ids))
+
+def step2_fetch_input(job, opts, downloads):
+    """Stage 2: Fetch Transcript or Audio (Fallback). Drops the job if no input is available."""
+    video_id = job['id']
+    transcript_file = 'step2_transcript.txt'
+    transcript = storage.load_step_text(video_id, transcript_file)
+
+    if not transcript:
+        languages = job.get('languages') or opts.get('transcript_languages', youtube.DEFAULT_TRANSCRIPT_LANGUAGES)
+        fetched = youtube.get_video_transcript_segments(video_id, languages)
+        transcript = fetched['text'] if fetched else None
+        if transcript:
+            # Segments (timestamps, language) are kept for later use; the text stays the step 2 checkpoint
+            segments = {key: value for key, value in fetched.items() if key != 'text'}
+            storage.save_step_json(video_id, 'step2_segments.json', segments)
+            storage.save_step_text(video_id, transcript_file, transcript)
+        else:
+            print(f"     [{video_id}] No transcript available")
+            # Fallback check
+            if not opts.get('allow_audio_download_fallback', False):
+                print(f"     [{video_id}] Fallback disabled, skipping")
+                return None
+
+            # Check if we already downloaded it (mp3, or the native m4a/opus stream)
+            fallback_audio_path = downloads.find_existing(video_id)
+            if fallback_audio_path:
+                print(f"     [{video_id}] Found existing fallback audio.")
+            else:
+                print(f"     [{video_id}] Attempting Audio Download Fallback...")
+                fallback_audio_path = downloads.download(video_id)
+                if not fallback_audio_path:
+                    print(f"     [{video_id}] Audio download failed, skipping")
+                    return None
+
+            if opts.get('preprocess_audio', True):
+                # Mono, low sample rate and without silences: same content, much smaller upload
+                upload_path = storage.get_file_path(video_id, 'step2_upload_audio.mp3')
+                fallback_audio_path = audio.preprocess_for_upload(fallback_audio_path, upload_path, opts)
+            job['audio_path'] = fallback_audio_path
+
+    job['transcript'] = transcript
+    return job
+
+def save_analysis(video_id, title, analysis_data, transcript, input_key):
+    """
+    Saves a successful analysis as step 3 checkpoint and marks the video processed.
+    `input_key` identifies model, prompts and input; the checkpoint is only reused while it matches.
+    """
+    storage.save_step_json(video_id, 'step3_analysis.json', dict(analysis_data, input_key=input_key))
+
+    # Update DB in one transaction
+    with database.transaction():
+        database.update_video_summary(video_id, analysis_data.get('summary', ''))
+        database.add_keywords(video_id, analysis_data.get('keywords', []))
+        database.update_video_status(video_id, 'processed')
+        database.index_video(video_id, title, analysis_data.get('summary', ''),
+                             analysis_data.get('keywords', []), transcript)
+
+def analysis_key(job, system_prompt, gen_conf, ai_clients):
+    """Cache key of the analysis input of a job (model, prompts, transcript or audio), or None."""
+    if job.get('transcript'):
+        model = job['model'] or gen_conf.get('ai_settings', {}).get('model', ai.DEFAULT_MODEL)
+        return ai.transcript_cache_key(model, system_prompt, job['user_prompt'], job['transcript'])
+    if job.get('audio_path'):
+        _, model = ai_clients.route_audio(job['provider'], job['model'])
+        return ai.audio_cache_key(model, system_prompt, job['user_prompt'], job['audio_path'])
+    return None
+
+def step3_analyze(job, system_prompt, gen_conf, ai_clients, ai_cache):
+    """Stage 3: AI Analysis. Reuses step3_analysis.json if it was made from the same input."""
+    video_id = job['id']
+    analysis_file = 'step3_analysis.json'
+    input_key = analysis_key(job, system_prompt, gen_conf, ai_clients)
+    analysis_data = storage.load_step_json(video_id, analysis_file)
+    if analysis_data and ai.is_failed_result(analysis_data):
+        # Saved by older versions; analyze again
+        analysis_data = None
+    elif analysis_data and input_key and analysis_data.get('input_key') != input_key:
+        # Made with another model or prompt (e.g. the channel's user_prompt changed)
+        print(f"     [{video_id}] Saved analysis is outdated, analyzing again")
+        analysis_data = None
+
+    if not analysis_data:
+        if job.get('transcript'):
+            print(f"     [{video_id}] AI Analysis running ({job['provider']}/{job['model']})...")
+            analysis_data = ai.analyze_transcript(job['transcript'], system_prompt, job['user_prompt'], gen_conf,
+                                                  ai_clients.get(job['provider']), ai_cache, job['model'])
+        elif job.get('audio_path'):
+            provider, model = ai_clients.route_audio(job['provider'], job['model'])
+            print(f"     [{video_id}] Analyzing Audio via Gemini ({model})...")
+            analysis_data = ai.analyze_audio(job['audio_path'], system_prompt, job['user_prompt'], gen_conf,
+                                             ai_clients.get(provider), ai_cache, model)
+
+            # Optional: Cleanup audio if we don't want to keep it?
+            # For now, we keep it as part of the 'trace'.
+        else:
+            print(f"     [{video_id}] No input data for analysis")
+            return None
+
+        if ai.is_failed_result(analysis_data):
+            # Not saved, so the next run tries again
+            print(f"     [{video_id}] AI Analysis failed, will retry next run")
+            return None
+
+        save_analysis(video_id, job['title'], analysis_data, job.get('transcript'), input_key)
+
+    job['analysis'] = analysis_data
+    return job
+
+def step4_tts(job, opts, speech):
+    """Stage 4: TTS. Only runs if enabled and the audio file doesn't exist yet."""
+    job['audio_file'] = None
+    if not opts.get('enable_tts', False):
+        return job
+
+    video_id = job['id']
+    audio_filename = 'step4_audio.mp3'
+    audio_path = storage.get_file_path(video_id, audio_filename)
+
+    if not os.path.exists(audio_path):
+        print(f"     [{video_id}] Generating Audio...")
+        summary_text = job['analysis'].get('summary', '')
+        if summary_text:
+            storage.ensure_video_folder(video_id)
+            speech.generate(summary_text, audio_path)
+
+    if os.path.exists(audio_path):
+        job['audio_file'] = audio_path
+    return job
+
+def collect_jobs(subscriptions, all_new_vids, feed_cache, max_videos, ai_clients):
+    """
+    Registers channels and new videos in the DB and returns the videos that still need work.
+    Already emailed videos are dropped with one bulk status lookup, before any disk or network work.
+    """
+    channel_videos = []
+    with database.transaction():
+        for sub, new_vids in zip(subscriptions, all_new_vids):
+            channel_id = sub['channel_id']
+            # Handle 'user_prompt' vs legacy 'analysis_prompt'
+            user_prompt = sub.get('user_prompt', sub.get('analysis_prompt', "Focus on key points."))
+
+            # Update Channel in DB
+            database.upsert_channel(channel_id, sub['channel_name'], user_prompt)
+
+            if new_vids is None:
+                # Feed not modified or not reachable: only retry videos that were not emailed yet
+                new_vids = [
+                    {
+                        'id': row[0],
+                        'title': row[2],
+                        'link': f"https://www.youtube.com/watch?v={row[0]}",
+                        'published': row[5]
+                    }
+                    for row in database.get_pending_videos(channel_id, max_videos)
+                ]
+            else:
+                cache = feed_cache.get(channel_id, {})
+                database.update_feed_cache(channel_id, cache.get('etag'), cache.get('modified'))
+
+            channel_videos.append((sub, user_prompt, new_vids))
+
+        # One query for the status of all candidate videos
+        statuses = database.get_video_statuses(
+            [vid['id'] for _, _, new_vids in channel_videos for vid in new_vids]
+        )
+
+        jobs = []
+        for sub, user_prompt, new_vids in channel_videos:
+            channel_name = sub['channel_name']
+            # Skip videos that were emailed already.
+            # Videos in any other state are retried; the step files let them resume where they stopped.
+            pending = [vid for vid in new_vids if statuses.get(vid['id']) != 'emailed']
+            skipped = len(new_vids) - len(pending)
+
+            if not pending:
+                print(f"{channel_name}: no new videos ({skipped} already processed)")
+                continue
+            print(f"{channel_name}: {len(pending)} to process, {skipped} already processed")
+            provider, model = ai_clients.route(sub)
+
+            for vid in pending:
+                video_id = vid['id']
+                if video_id not in statuses:
+                    database.add_video(video_id, sub['channel_id'], vid['title'], vid['published'], 'new')
+                    # Save Step 1 Data
+                    storage.save_step_json(video_id, 'step1_metadata.json', vid)
+
+                print(f"  -> Queued: {vid['title']} [{video_id}]")
+                jobs.append({
+                    'id': video_id,
+                    'channel': channel_name,
+                    'title': vid['title'],
+                    'link': vid['link'],
+                    'user_prompt': user_prompt,
+                    'languages': sub.get('transcript_languages'),
+                    'provider': provider,
+                    'model': model
+                })
+
+    return jobs
+
+def init_run(gen_conf):
+    """Initializes DB and storage and creates the resources shared by all cycles of a run."""
     database.init_db()
+    opts = gen_conf.get('working_options', {})
+    storage.set_backend(storage.create_backend(opts))
+
+    return {
+        # Audio downloads for the fallback path share yt-dlp instances for the whole run
+        'downloads': youtube.DownloadManager(
+            os.path.join(storage.DATA_DIR, '%(id)s', 'step2_fallback_audio.%(ext)s'),
+            max_parallel=opts.get('max_parallel_downloads', 2),
+            keep_native=opts.get('keep_native_audio', False)
+        ),
+        # One client per AI provider and one result cache for the whole run
+        'ai_clients': ai.ClientPool(gen_conf),
+        'ai_cache': ai.create_result_cache(gen_conf),
+        # TTS runs in its own stage; identical summaries are served from the audio cache
+        'speech': tts.AudioGenerator(opts.get('tts_lang', 'en'), tts.create_audio_cache(opts),
+                                     opts.get('tts_engine', tts.DEFAULT_ENGINE),
+                                     opts.get('tts_processes', tts.DEFAULT_PROCESSES)),
+    }
 
+def close_run(run):
+    run['downloads'].close()
+    run['speech'].close()
+
+def run_cycle(subscriptions, gen_conf, proj_conf, run, feed_cache):
+    """Fetches the feeds of `subscriptions`, processes their new videos and emails the report."""
     # Get execution options
     opts = gen_conf.get('working_options', {})
-    enable_tts = opts.get('enable_tts', False)
-    allow_audio_fallback = opts.get('allow_audio_download_fallback', False)
     max_videos = opts.get('max_videos_per_channel', 3)
+    max_parallel_feeds = opts.get('max_parallel_feeds', 8)
     system_prompt = proj_conf.get('system_prompt', "Summarize the video.")
+    downloads, ai_clients, ai_cache, speech = run['downloads'], run['ai_clients'], run['ai_cache'], run['speech']
 
-    email_results = []
+    # Step 1: Fetch Metadata of all channels in parallel
+    print(f"Fetching {len(subscriptions)} feeds (max {max_parallel_feeds} parallel)...")
+    fetch_start = time.perf_counter()
+    all_new_vids = fetch_all_feeds(subscriptions, max_videos, max_parallel_feeds, feed_cache)
+    fetch_time = time.perf_counter() - fetch_start
 
-    for sub in proj_conf['subscriptions']:
-        channel_name = sub['channel_name']
-        channel_id = sub['channel_id']
-        # Handle 'user_prompt' vs legacy 'analysis_prompt'
-        user_prompt = sub.get('user_prompt', sub.get('analysis_prompt', "Focus on key points."))
-        
-        print(f"Checking channel: {channel_name}...")
+    process_start = time.perf_counter()
+    jobs = collect_jobs(subscriptions, all_new_vids, feed_cache, max_videos, ai_clients)
 
-        # Update Channel in DB
-        database.upsert_channel(channel_id, channel_name, user_prompt)
+    # One analysis worker per call the providers accept at the same time, so every provider
+    # can use its max_concurrent; audio falls back to Gemini, so it is always counted.
+    ai_workers = ai_clients.max_concurrent({job['provider'] for job in jobs} | {'google'})
 
-        # Step 1: Fetch Metadata
-        new_vids = youtube.get_new_videos(channel_id, limit=max_videos)
-        
-        if not new_vids:
-            print("  -> No new videos.")
-            continue
-            
-        for vid in new_vids:
-            video_id = vid['id']
-            video_title = vid['title']
-            published = vid['published']
-
-            # Check if processed or exists in DB
-            db_video = database.get_video(video_id)
-            if db_video:
-                # If status is 'emailed', skip. If 'processed', maybe re-email or skip.
-                # For now, let's assume if it exists in DB, we skip unless we want to retry failed steps.
-                # But requirement says "next step should work on this folder".
-                # Let's assume we skip if status is 'emailed'.
-                if db_video[4] == 'emailed':
-                    print(f"  -> Skipping processed video: {video_title}")
-                    continue
-            else:
-                database.add_video(video_id, channel_id, video_title, published, 'new')
-
-            print(f"  -> Processing: {video_title}")
-            
-            # Save Step 1 Data
-            storage.save_step_json(video_id, 'step1_metadata.json', vid)
-
-            # Step 2: Fetch Transcript or Audio (Fallback)
-            transcript_file = 'step2_transcript.txt'
-            transcript = storage.load_step_text(video_id, transcript_file)
-            downloaded_audio_path = None
-
-            if not transcript:
-                transcript = youtube.get_video_transcript(video_id)
-                if transcript:
-                    storage.save_step_text(video_id, transcript_file, transcript)
-                else:
-                    print("     (No transcript available)")
-                    # Fallback check
-                    if allow_audio_fallback:
-                        # Check if we already downloaded it
-                        # For tracing, we might look for 'step2_audio.mp3' in the storage folder
-                        fallback_audio_filename = 'step2_fallback_audio.mp3'
-                        fallback_audio_path = storage.get_file_path(video_id, fallback_audio_filename)
-
-                        if os.path.exists(fallback_audio_path):
-                            print("     -> Found existing fallback audio.")
-                            downloaded_audio_path = fallback_audio_path
-                        else:
-                            print("     -> Attempting Audio Download Fallback...")
-                            # download_audio returns full path. We want to control the path.
-                            downloaded_path = youtube.download_audio(video_id, fallback_audio_path)
-                            if downloaded_path and os.path.exists(downloaded_path):
-                                downloaded_audio_path = downloaded_path
-                            else:
-                                print("     (Audio download failed, skipping)")
-                                continue
-                    else:
-                        print("     (Fallback disabled, skipping)")
-                        continue
-
-            # Step 3: AI Analysis
-            analysis_file = 'step3_analysis.json'
-            analysis_data = storage.load_step_json(video_id, analysis_file)
-            
-            if not analysis_data:
-                print("     -> AI Analysis running...")
-                if transcript:
-                    analysis_data = ai.analyze_transcript(transcript, system_prompt, user_prompt, gen_conf)
-                elif downloaded_audio_path:
-                     print("     -> Analyzing Audio via Gemini...")
-                     analysis_data = ai.analyze_audio(downloaded_audio_path, system_prompt, user_prompt, gen_conf)
-
-                     # Optional: Cleanup audio if we don't want to keep it?
-                     # For now, we keep it as part of the 'trace'.
-                else:
-                    print("     (No input data for analysis)")
-                    continue
-
-                storage.save_step_json(video_id, analysis_file, analysis_data)
-
-                # Update DB
-                database.update_video_summary(video_id, analysis_data.get('summary', ''))
-                for kw in analysis_data.get('keywords', []):
-                    database.add_keyword(video_id, kw)
-
-                database.update_video_status(video_id, 'processed')
-
-            # Step 4: TTS
-            audio_path = None
-            if enable_tts:
-                audio_filename = 'step4_audio.mp3'
-                audio_path = storage.get_file_path(video_id, audio_filename)
-
-                if not os.path.exists(audio_path):
-                    print("     -> Generating Audio...")
-                    summary_text = analysis_data.get('summary', '')
-                    if summary_text:
-                        tts.generate_audio_summary(summary_text, audio_path, opts.get('tts_lang', 'en'))
-
-            # Collect result for email
-            email_results.append({
-                'channel': channel_name,
-                'title': video_title,
-                'link': vid['link'],
-                'id': video_id,
-                'summary': analysis_data.get('summary', ''),
-                'keywords': analysis_data.get('keywords', []),
-                'audio_file': audio_path if enable_tts and os.path.exists(audio_path) else None
-            })
+    # Steps 2-4 run as a pipeline: every stage has its own worker pool, and the
+    # step files in storage act as checkpoints between the stages.
+    stages = [
+        ('transcript', lambda job: step2_fetch_input(job, opts, downloads), opts.get('max_parallel_transcripts', 4)),
+        ('analysis', lambda job: step3_analyze(job, system_prompt, gen_conf, ai_clients, ai_cache), ai_workers),
+        ('tts', lambda job: step4_tts(job, opts, speech), opts.get('max_parallel_tts', 2)),
+    ]
+    if jobs:
+        print(f"Processing {len(jobs)} videos...")
+    done_jobs = pipeline.run_pipeline(jobs, stages)
+    storage.flush()
+
+    # Collect results for email
+    email_results = [
+        {
+            'channel': job['channel'],
+            'title': job['title'],
+            'link': job['link'],
+            'id': job['id'],
+            'summary': job['analysis'].get('summary', ''),
+            'keywords': job['analysis'].get('keywords', []),
+            'audio_file': job['audio_file']
+        }
+        for job in done_jobs
+    ]
+
+    process_time = time.perf_counter() - process_start
+    print(f"Timing: fetching {fetch_time:.2f}s, processing {process_time:.2f}s")
+    ai_clients.cleanup_files()
+    ai_clients.print_stats()
+    ai_cache.print_stats("AI result")
+    if opts.get('enable_tts', False):
+        speech.print_stats()
 
     # Step 5: Report / Email
     if email_results:
         print(f"Sending report with {len(email_results)} items...")
-        success = email_sender.send_email(email_results, gen_conf)
-        
-        if success:
-            for item in email_results:
-                database.update_video_status(item['id'], 'emailed')
+        # Large reports go out as several digests; each one is marked emailed once delivered
+        email_sender.send_email(email_results, gen_conf,
+                                lambda items: database.update_videos_status([item['id'] for item in items], 'emailed'))
     else:
         print("Nichts zu berichten.")
 
+def run_monitor(gen_conf, proj_conf):
+    run = init_run(gen_conf)
+    try:
+        run_cycle(proj_conf['subscriptions'], gen_conf, proj_conf, run, database.get_feed_cache())
+    finally:
+        close_run(run)
+
+def run_daemon(gen_conf, proj_conf):
+    """
+    Runs until interrupted, polling every channel on its own schedule derived from its
+    upload history (see src/scheduler.py). DB connection, AI clients, caches and feed
+    ETags stay in memory between cycles. Cycles run one at a time, so the worker limits
+    (max_parallel_feeds and the pipeline stages) cap the concurrency of the whole daemon.
+    """
+    opts = gen_conf.get('working_options', {})
+    run = init_run(gen_conf)
+    feed_cache = database.get_feed_cache()
+    subscriptions = {sub['channel_id']: sub for sub in proj_conf['subscriptions']}
+    schedule = scheduler.Scheduler(
+        min_interval=opts.get('daemon_min_interval_minutes', 5) * 60,
+        max_interval=opts.get('daemon_max_interval_hours', 24) * 3600,
+        jitter=opts.get('daemon_jitter', scheduler.DEFAULT_JITTER)
+    )
+    for channel_id in subscriptions:
+        schedule.add(channel_id)
+
+    print(f"Daemon started with {len(subscriptions)} channels.")
+    try:
+        while True:
+            due = schedule.due(time.time())
+            if due:
+                print(f"[{time.strftime('%H:%M:%S')}] Polling {len(due)} of {len(subscriptions)} channels...")
+                try:
+                    run_cycle([subscriptions[c] for c in due], gen_conf, proj_conf, run, feed_cache)
+                except Exception as e:
+                    print(f"Cycle failed: {e}")
+
+                now = time.time()
+                try:
+                    history = database.get_upload_history(due, scheduler.HISTORY_SIZE)
+                except Exception as e:
+                    # The channels still have to be rescheduled; without history they get the default interval
+                    print(f"Could not load upload history: {e}")
+                    history = {}
+                for channel_id in due:
+                    schedule.reschedule(channel_id, history.get(channel_id, []), now)
+
+            next_time = schedule.next_time()
+            if next_time is None:
+                # No subscriptions
+                time.sleep(schedule.max_interval)
+            else:
+                time.sleep(max(1, next_time - time.time()))
+    finally:
+        close_run(run)
+
+def run_batch(gen_conf, proj_conf):
+    """
+    Analyzes all videos that have a transcript but no analysis yet through the
+    providers' batch APIs (one batch per provider/model) and saves the results.
+    Videos without transcript or with a transcript that needs chunking are left
+    to the normal run.
+    """
+    database.init_db()
+    storage.set_backend(storage.create_backend(gen_conf.get('working_options', {})))
+
+    ai_settings = gen_conf.get('ai_settings', {})
+    chunk_max_tokens = ai_settings.get('chunk_max_tokens', ai.DEFAULT_CHUNK_MAX_TOKENS)
+    poll_interval = ai_settings.get('batch_poll_seconds', 60)
+    system_prompt = proj_conf.get('system_prompt', "Summarize the video.")
+    subscriptions = {sub['channel_id']: sub for sub in proj_conf['subscriptions']}
+
+    ai_clients = ai.ClientPool(gen_conf)
+    ai_cache = ai.create_result_cache(gen_conf)
+
+    # (provider, model) -> list of (video_id, title, prompt, transcript, cache_key)
+    groups = {}
+    skipped = 0
+    saved = 0
+    for video_id, channel_id, title, user_prompt in database.get_videos_awaiting_analysis():
+        transcript = storage.load_step_text(video_id, 'step2_transcript.txt')
+        if not transcript or (chunk_max_tokens and ai.estimate_tokens(transcript) > chunk_max_tokens):
+            skipped += 1
+            continue
+
+        sub = subscriptions.get(channel_id, {})
+        user_prompt = sub.get('user_prompt', sub.get('analysis_prompt', user_prompt or "Focus on key points."))
+        provider, model = ai_clients.route(sub)
+        cache_key = ai.transcript_cache_key(model, system_prompt, user_prompt, transcript)
+        analysis_data = storage.load_step_json(video_id, 'step3_analysis.json')
+        if analysis_data and not ai.is_failed_result(analysis_data) and analysis_data.get('input_key') == cache_key:
+            continue
+        cached = ai_cache.get(cache_key)
+        if cached is not None:
+            save_analysis(video_id, title, cached, transcript, cache_key)
+            saved += 1
+            continue
+
+        prompt = ai.build_transcript_prompt(system_prompt, user_prompt, transcript)
+        groups.setdefault((provider, model), []).append((video_id, title, prompt, transcript, cache_key))
+
+    start = time.perf_counter()
+    failed = 0
+    groups = list(groups.items())
+    jobs = []
+    for (provider, model), items in groups:
+        client = ai_clients.get(provider)
+        client.check(model)
+        # Providers without batch API get as many parallel requests as their client allows
+        endpoint = batch.create_batch(provider, client, ai_clients.max_concurrent([provider]))
+        jobs.append((endpoint, model, [(item[0], item[2]) for item in items]))
+
+    for index, results in batch.submit_all(jobs, poll_interval):
+        for video_id, title, _, transcript, cache_key in groups[index][1]:
+            try:
+                analysis_data = ai.parse_analysis(results[video_id])
+            except (KeyError, ValueError) as e:
+                print(f"     [{video_id}] Batch analysis failed ({e}), will retry next run")
+                failed += 1
+                continue
+            save_analysis(video_id, title, analysis_data, transcript, cache_key)
+            ai_cache.put(cache_key, analysis_data)
+            saved += 1
+
+    storage.flush()
+    print(f"Batch: {saved} analyses saved, {failed} failed, {skipped} skipped "
+          f"(no transcript or too long) in {time.perf_counter() - start:.1f}s")
+    ai_cache.print_stats("AI result")
+
+def backfill_search_index(opts):
+    """One-time: adds the saved transcripts of videos archived before the search index existed."""
+    if not database.has_transcript_backfill():
+        return
+    storage.set_backend(storage.create_backend(opts))
+    print("Adding saved transcripts to the search index (only once)...")
+    added = database.backfill_transcripts(
+        lambda video_id: storage.load_step_text(video_id, 'step2_transcript.txt'))
+    print(f"Indexed {added} transcripts.")
+
+def search(query, opts):
+    """Prints archived videos matching the query, best matches first."""
+    database.init_db()
+    backfill_search_index(opts)
+    start = time.perf_counter()
+    rows = database.search_videos(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for video_id, title, channel_name, published, snippet in rows:
+        print(f"{published or '':<25} {channel_name or '?'}: {title}")
+        print(f"    https://www.youtube.com/watch?v={video_id}")
+        print(f"    {snippet}")
+    print(f"{len(rows)} results in {elapsed_ms:.1f} ms")
 
 def main():
     parser = argparse.ArgumentParser(description="YouTube Assistant Monitor")
@@ -169,6 +493,11 @@ def main():
     parser.add_argument("--test-tts", nargs=1, metavar="TEXT", help="Generate a test MP3 from the given text")
     parser.add_argument("--test-youtube", action="store_true", help="Check configured YouTube channels")
     parser.add_argument("--test-ai", action="store_true", help="Test connection to configured AI providers")
+    parser.add_argument("--search", nargs=1, metavar="QUERY", help="Full-text search in processed videos")
+    parser.add_argument("--migrate-storage", action="store_true", help="Move the step files in data/ into the packed artifact store")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and poll every channel on its own adaptive schedule")
+    parser.add_argument("--batch", action="store_true", help="Analyze all pending transcripts through the AI providers' batch APIs")
+    parser.add_argument("--compress-storage", action="store_true", help="Compress existing uncompressed step files in data/")
 
     args = parser.parse_args()
 
@@ -176,6 +505,18 @@ def main():
         config_manager.generate_dummy_configs()
         return
 
+    if args.search:
+        try:
+            # The config is only needed to find the saved transcripts for the index backfill
+            try:
+                opts = config_manager.load_configs()[0].get('working_options', {})
+            except Exception:
+                opts = {}
+            search(args.search[0], opts)
+        finally:
+            database.close_connection()
+        return
+
     # Load configs
     try:
         gen_conf, proj_conf = config_manager.load_configs()
@@ -183,17 +524,51 @@ def main():
         print(f"Error: {e}")
         return
 
-    if args.test_email:
-        test_utils.test_email_config(gen_conf)
-    elif args.test_tts:
-        test_utils.test_tts(args.test_tts[0])
-    elif args.test_youtube:
-        test_utils.test_youtube_channels(proj_conf)
-    elif args.test_ai:
-        test_utils.test_ai_connections(proj_conf['subscriptions'])
+    if args.migrate_storage:
+        opts = gen_conf.get('working_options', {})
+        target = storage.SQLiteBlobBackend(level=opts.get('storage_compression_level', 6))
+        count = storage.migrate_to_blob_store(target)
+        target.close()
+        print(f"Imported {count} files into {target.path}.")
+        if opts.get('storage_backend', 'files') != 'sqlite':
+            print("Set working_options.storage_backend to 'sqlite' to use it.")
+    elif args.compress_storage:
+        opts = gen_conf.get('working_options', {})
+        compression = opts.get('storage_compression', 'none')
+        if compression == 'none':
+            print("working_options.storage_compression is 'none', nothing to do.")
+        else:
+            count = storage.compress_existing(compression, opts.get('storage_compression_level', 6))
+            print(f"Compressed {count} files with {compression}.")
+    elif args.daemon:
+        try:
+            run_daemon(gen_conf, proj_conf)
+        except KeyboardInterrupt:
+            print("Daemon stopped.")
+        finally:
+            database.close_connection()
+    elif args.batch:
+        try:
+            run_batch(gen_conf, proj_conf)
+        finally:
+            database.close_connection()
+    elif args.test_email or args.test_tts or args.test_youtube or args.test_ai:
+        # test_utils imports every AI SDK, so it is only loaded for the checks
+        from src import test_utils
+        if args.test_email:
+            test_utils.test_email_config(gen_conf)
+        elif args.test_tts:
+            test_utils.test_tts(args.test_tts[0])
+        elif args.test_youtube:
+            test_utils.test_youtube_channels(proj_conf)
+        else:
+            test_utils.test_ai_connections(proj_conf['subscriptions'])
     else:
         print("Starting YouTube Monitor...")
-        run_monitor(gen_conf, proj_conf)
+        try:
+            run_monitor(gen_conf, proj_conf)
+        finally:
+            database.close_connection()
 
 if __name__ == "__main__":
     main()
@@ -1,24 +1,456 @@
 import os
+import re
 import json
-import google.generativeai as genai
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from src import cache as disk_cache
+from src import storage
 
-def analyze_transcript(transcript_text, system_prompt, user_prompt, config):
+# google.generativeai takes about a second to import, so it is loaded on first use
+genai = None
+
+def _load_genai():
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
+
+DEFAULT_MODEL = 'gemini-1.5-flash'
+# Transcripts longer than this (estimated) are summarized in chunks; 0 disables chunking
+DEFAULT_CHUNK_MAX_TOKENS = 100000
+DEFAULT_CHUNK_PARALLELISM = 4
+# Rough average for English/German text
+CHARS_PER_TOKEN = 4
+DEFAULT_CACHE_MAX_MB = 100
+# Concurrent calls per provider unless ai_settings.providers.<provider>.max_concurrent is set
+DEFAULT_MAX_CONCURRENT = 4
+# Uploaded files are only reused if they stay valid for at least this long
+REMOTE_FILE_MIN_LIFETIME = timedelta(hours=1)
+REMOTE_FILE_SUFFIX = '.remote'
+
+def create_result_cache(config):
+    """Creates the on-disk cache for analysis results, sized by ai_settings.cache_max_mb."""
+    max_mb = config.get('ai_settings', {}).get('cache_max_mb', DEFAULT_CACHE_MAX_MB)
+    return disk_cache.DiskCache('ai', max_mb * 1024 * 1024)
+
+# Provider names as used in the subscriptions, mapped to their canonical name
+PROVIDER_ALIASES = {
+    'gemini': 'google',
+    'chatgpt': 'openai',
+    'claude': 'anthropic',
+}
+
+# Model used for a provider when a subscription names only the provider
+DEFAULT_PROVIDER_MODELS = {
+    'google': DEFAULT_MODEL,
+    'openai': 'gpt-4o-mini',
+    'anthropic': 'claude-3-5-haiku-latest',
+}
+
+def normalize_provider(provider):
+    provider = provider.lower().strip()
+    return PROVIDER_ALIASES.get(provider, provider)
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens and refills `rate` tokens per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount, now):
+        """Refills the bucket and returns how long to wait until `amount` tokens are available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Requests larger than the bucket only have to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+class RateLimiter:
     """
-    Sends text to Gemini for analysis.
-    Returns a dictionary with 'summary' and 'keywords'.
+    Shared limiter for all calls to one provider: a request bucket (requests per minute)
+    and a token bucket (estimated prompt tokens per minute); 0 disables a bucket.
+    A rate-limit answer from the API pauses all callers via pause().
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if self._requests:
+                    wait = max(wait, self._requests.wait_time(1, now))
+                if self._tokens:
+                    wait = max(wait, self._tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    if self._requests:
+                        self._requests.take(1)
+                    if self._tokens:
+                        self._tokens.take(tokens)
+                    return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+RETRYABLE_STATUS_RE = re.compile(r'(?<![\w.])(429|500|502|503|504)(?![\w.])')
+
+def is_retryable_error(error):
+    """True for rate limit, quota, timeout and server errors, which are worth retrying."""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    markers = ('rate limit', 'ratelimit', 'resourceexhausted', 'resource exhausted', 'quota',
+               'overloaded', 'unavailable', 'timeout', 'timed out')
+    # Status codes only as whole numbers, not inside e.g. "prompt has 1500000 tokens"
+    return any(marker in text for marker in markers) or bool(RETRYABLE_STATUS_RE.search(text))
+
+class BaseClient:
+    """
+    Common part of the provider clients: API key lookup, a concurrency limit,
+    request/token rate limits, retries with exponential backoff, and call count /
+    total latency per model.
+
+    `limits` are the ai_settings.providers.<provider> settings: max_concurrent,
+    requests_per_minute, tokens_per_minute, max_retries, retry_base_delay.
+    """
+
+    provider = None
+    env_var = None
+
+    def __init__(self, api_key=None, limits=None):
+        limits = limits or {}
+        self._api_key = api_key
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max(1, limits.get('max_concurrent', DEFAULT_MAX_CONCURRENT)))
+        self._limiter = RateLimiter(limits.get('requests_per_minute', 0), limits.get('tokens_per_minute', 0))
+        self.max_retries = limits.get('max_retries', 5)
+        self.retry_base_delay = limits.get('retry_base_delay', 2.0)
+        self.stats = {}
+        self.retries = 0
+
+    def _get_api_key(self):
+        api_key = self._api_key or os.getenv(self.env_var)
+        if not api_key:
+            raise ValueError(f"{self.env_var} not found in .env!")
+        return api_key
+
+    def check(self, model_name):
+        """Raises ValueError if the client can't be used (e.g. missing API key)."""
+        raise NotImplementedError
+
+    def generate_text(self, model_name, prompt):
+        """Sends a text prompt and returns the text of the answer."""
+        raise NotImplementedError
+
+    def _call(self, model_name, func, tokens=0):
+        """
+        Runs one API call within the concurrency and rate limits and records its latency.
+        Rate limit and server errors are retried with exponential backoff and jitter;
+        the backoff pauses all calls to this provider.
+        """
+        attempt = 0
+        while True:
+            with self._semaphore:
+                self._limiter.acquire(tokens)
+                start = time.perf_counter()
+                try:
+                    return func()
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable_error(e):
+                        raise
+                    error = e
+                finally:
+                    self._record(model_name, time.perf_counter() - start)
+
+            delay = self.retry_base_delay * (2 ** attempt) * random.uniform(1.0, 1.5)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            print(f"AI {self.provider}/{model_name}: {error}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            self._limiter.pause(delay)
+
+    def _record(self, model_name, seconds):
+        with self._lock:
+            entry = self.stats.setdefault(model_name, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+
+    def print_stats(self):
+        for model_name, entry in sorted(self.stats.items()):
+            print(f"AI {self.provider}/{model_name}: {entry['calls']} calls, {entry['seconds']:.2f}s total")
+        if self.retries:
+            print(f"AI {self.provider}: {self.retries} retries")
+
+    def cleanup_files(self):
+        pass
+
+class GeminiClient(BaseClient):
+    """Configures Gemini once per run and caches one GenerativeModel per model name."""
+
+    provider = 'google'
+    env_var = 'GEMINI_API_KEY'
+
+    def __init__(self, api_key=None, limits=None):
+        super().__init__(api_key, limits)
+        self._configured = False
+        self._models = {}
+        self._finished_files = []
+
+    def _configure(self):
+        if self._configured:
+            return
+        _load_genai().configure(api_key=self._get_api_key())
+        self._configured = True
+
+    def get_model(self, model_name):
+        with self._lock:
+            self._configure()
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def check(self, model_name):
+        self.get_model(model_name)
+
+    def generate(self, model_name, contents):
+        """Calls generate_content on the cached model and records the latency."""
+        model = self.get_model(model_name)
+        prompt = contents if isinstance(contents, str) else next((c for c in contents if isinstance(c, str)), '')
+        return self._call(model_name, lambda: model.generate_content(contents), estimate_tokens(prompt))
+
+    def generate_text(self, model_name, prompt):
+        return self.generate(model_name, prompt).text
+
+    def upload_file(self, path):
+        """
+        Uploads a file, or reuses the file uploaded by an earlier attempt while it is still valid.
+        The remote handle is recorded as JSON in <path>.remote.
+        """
+        with self._lock:
+            self._configure()
+
+        handle = _load_remote_handle(path)
+        if handle:
+            try:
+                remote_file = self._call('files', lambda: genai.get_file(handle['name']))
+                print(f"Reusing uploaded file {handle['name']}")
+                return remote_file
+            except Exception:
+                # Deleted or expired on the server
+                pass
+
+        remote_file = self._call('files', lambda: genai.upload_file(path))
+        _save_remote_handle(path, remote_file)
+        return remote_file
+
+    def finish_file(self, remote_file):
+        """Marks an uploaded file as no longer needed; it is deleted by cleanup_files()."""
+        with self._lock:
+            self._finished_files.append(remote_file.name)
+
+    def cleanup_files(self):
+        """Deletes all finished remote files at once."""
+        with self._lock:
+            names = self._finished_files
+            self._finished_files = []
+        if not names:
+            return
+
+        def delete(name):
+            try:
+                genai.delete_file(name)
+                return True
+            except Exception as e:
+                print(f"Could not delete remote file {name}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(8, len(names))) as executor:
+            deleted = sum(executor.map(delete, names))
+        print(f"Deleted {deleted} of {len(names)} uploaded files.")
+
+class OpenAIClient(BaseClient):
+    provider = 'openai'
+    env_var = 'OPENAI_API_KEY'
+
+    def __init__(self, api_key=None, limits=None):
+        super().__init__(api_key, limits)
+        self._client = None
+
+    def get_sdk_client(self):
+        with self._lock:
+            if self._client is None:
+                import openai
+                self._client = openai.OpenAI(api_key=self._get_api_key())
+            return self._client
+
+    def check(self, model_name):
+        self.get_sdk_client()
+
+    def generate_text(self, model_name, prompt):
+        client = self.get_sdk_client()
+        response = self._call(model_name, lambda: client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}]
+        ), estimate_tokens(prompt))
+        return response.choices[0].message.content
+
+class AnthropicClient(BaseClient):
+    provider = 'anthropic'
+    env_var = 'ANTHROPIC_API_KEY'
+    max_tokens = 4096
+
+    def __init__(self, api_key=None, limits=None):
+        super().__init__(api_key, limits)
+        self._client = None
+
+    def get_sdk_client(self):
+        with self._lock:
+            if self._client is None:
+                import anthropic
+                self._client = anthropic.Anthropic(api_key=self._get_api_key())
+            return self._client
+
+    def check(self, model_name):
+        self.get_sdk_client()
+
+    def generate_text(self, model_name, prompt):
+        client = self.get_sdk_client()
+        response = self._call(model_name, lambda: client.messages.create(
+            model=model_name,
+            max_tokens=self.max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        ), estimate_tokens(prompt))
+        return response.content[0].text
+
+CLIENT_CLASSES = {
+    'google': GeminiClient,
+    'openai': OpenAIClient,
+    'anthropic': AnthropicClient,
+}
+
+class ClientPool:
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in .env!")
+    One client per provider for the whole run, created on first use.
+    Limits per provider come from ai_settings.providers.<provider>, see BaseClient.
+    """
+
+    def __init__(self, config):
+        self._settings = config.get('ai_settings', {})
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def route(self, subscription):
+        """Returns (provider, model) for a subscription, falling back to the ai_settings defaults."""
+        default_provider = normalize_provider(self._settings.get('provider', 'google'))
+        provider = normalize_provider(subscription.get('provider') or default_provider)
+        model = subscription.get('model')
+        if not model:
+            if provider == default_provider:
+                model = self._settings.get('model', DEFAULT_PROVIDER_MODELS.get(provider))
+            else:
+                model = DEFAULT_PROVIDER_MODELS.get(provider)
+        return provider, model
+
+    def route_audio(self, provider, model):
+        """Audio can only be uploaded to Gemini; other providers use the configured Gemini model."""
+        if provider == 'google':
+            return 'google', model
+        if normalize_provider(self._settings.get('provider', 'google')) == 'google':
+            return 'google', self._settings.get('model', DEFAULT_MODEL)
+        return 'google', DEFAULT_MODEL
+
+    def max_concurrent(self, providers):
+        """Total number of calls the given providers accept at the same time."""
+        limits = self._settings.get('providers', {})
+        return sum(max(1, limits.get(provider, {}).get('max_concurrent', DEFAULT_MAX_CONCURRENT))
+                   for provider in set(providers))
+
+    def get(self, provider):
+        with self._lock:
+            if provider not in self._clients:
+                if provider not in CLIENT_CLASSES:
+                    raise ValueError(f"Unknown AI provider: {provider}")
+                limits = self._settings.get('providers', {}).get(provider, {})
+                self._clients[provider] = CLIENT_CLASSES[provider](limits=limits)
+            return self._clients[provider]
+
+    def cleanup_files(self):
+        for client in list(self._clients.values()):
+            client.cleanup_files()
+
+    def print_stats(self):
+        for client in list(self._clients.values()):
+            client.print_stats()
+
+# Summary prefixes of failed analyses saved by older versions (before the "failed" flag)
+FAILED_SUMMARY_PREFIXES = ("AI Analysis failed:", "AI Audio Analysis failed:", "Audio Upload failed:")
+
+def is_failed_result(analysis_data):
+    """True if an analysis result is the fallback structure of a failed analysis."""
+    if analysis_data.get('failed'):
+        return True
+    return str(analysis_data.get('summary', '')).startswith(FAILED_SUMMARY_PREFIXES)
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+def _load_remote_handle(path):
+    """Returns the recorded upload of `path` if it is for the same file content and not about to expire."""
+    handle_path = path + REMOTE_FILE_SUFFIX
+    try:
+        with open(handle_path, 'r', encoding='utf-8') as f:
+            handle = json.load(f)
+        expires_at = datetime.fromisoformat(handle['expires_at'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
-    genai.configure(api_key=api_key)
+    if handle.get('source') != _file_signature(path):
+        return None
+    if expires_at - datetime.now(timezone.utc) < REMOTE_FILE_MIN_LIFETIME:
+        return None
+    return handle
 
-    model_name = config['ai_settings'].get('model', 'gemini-1.5-flash')
-    model = genai.GenerativeModel(model_name)
+def _save_remote_handle(path, remote_file):
+    expires_at = getattr(remote_file, 'expiration_time', None)
+    if expires_at is None:
+        # Gemini keeps uploads for 48 hours
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=48)
+    elif expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
 
+    handle = {
+        'name': remote_file.name,
+        'uri': getattr(remote_file, 'uri', None),
+        'expires_at': expires_at.isoformat(),
+        'source': _file_signature(path)
+    }
+    storage.atomic_write(path + REMOTE_FILE_SUFFIX, json.dumps(handle).encode('utf-8'))
+
+def _build_instruction(system_prompt, user_prompt, content_hint):
     # Prompt Engineering
     # We ask for a JSON response to parse summary and keywords easily
-    instruction = (
+    return (
         f"{system_prompt}\n"
         f"Specific instructions: {user_prompt}\n\n"
         f"Please provide the output in the following JSON format:\n"
@@ -26,82 +458,201 @@ def analyze_transcript(transcript_text, system_prompt, user_prompt, config):
         f"  \"summary\": \"The summary of the video...\",\n"
         f"  \"keywords\": [\"keyword1\", \"keyword2\", ...]\n"
         f"}}\n\n"
-        f"Here is the video transcript:\n{transcript_text}"
+        f"{content_hint}"
     )
 
-    try:
-        response = model.generate_content(instruction)
-        text_response = response.text
+def _parse_response(text_response):
+    # Simple cleanup to ensure we get JSON if the model wraps it in markdown code blocks
+    if text_response.startswith("```json"):
+        text_response = text_response.replace("```json", "", 1)
+    elif text_response.startswith("```"):
+        text_response = text_response.replace("```", "", 1)
+
+    if text_response.endswith("```"):
+        text_response = text_response.rsplit("```", 1)[0]
+
+    return json.loads(text_response.strip())
+
+def build_transcript_prompt(system_prompt, user_prompt, transcript_text):
+    return _build_instruction(system_prompt, user_prompt, f"Here is the video transcript:\n{transcript_text}")
+
+def parse_analysis(text_response):
+    """Parses a model answer into the analysis dict; raises ValueError if it isn't valid JSON."""
+    return _parse_response(text_response)
+
+def transcript_cache_key(model_name, system_prompt, user_prompt, transcript_text):
+    return disk_cache.hash_key('transcript', model_name, system_prompt, user_prompt, transcript_text)
+
+def audio_cache_key(model_name, system_prompt, user_prompt, audio_path):
+    return disk_cache.hash_key('audio', model_name, system_prompt, user_prompt, disk_cache.hash_file(audio_path))
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_transcript(text, max_tokens):
+    """
+    Splits a transcript into chunks of at most `max_tokens` (estimated).
+    Splits on sentence boundaries; sentences that are too long on their own
+    (auto-generated transcripts often have no punctuation) are split on words.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    pieces = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        words = []
+        length = 0
+        for word in sentence.split():
+            if words and length + len(word) + 1 > max_chars:
+                pieces.append(" ".join(words))
+                words = []
+                length = 0
+            words.append(word)
+            length += len(word) + 1
+        if words:
+            pieces.append(" ".join(words))
+
+    chunks = []
+    current = []
+    length = 0
+    for piece in pieces:
+        if current and length + len(piece) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current = []
+            length = 0
+        current.append(piece)
+        length += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def _generate_json(client, model_name, prompt):
+    return _parse_response(client.generate_text(model_name, prompt))
 
-        # Simple cleanup to ensure we get JSON if the model wraps it in markdown code blocks
-        if text_response.startswith("```json"):
-            text_response = text_response.replace("```json", "", 1)
-        elif text_response.startswith("```"):
-            text_response = text_response.replace("```", "", 1)
+def _analyze_chunked(chunks, system_prompt, user_prompt, model_name, client, parallelism):
+    """Map-reduce: summarizes the chunks in parallel, then merges the partial results."""
+    total = len(chunks)
 
-        if text_response.endswith("```"):
-            text_response = text_response.rsplit("```", 1)[0]
+    def summarize_chunk(numbered_chunk):
+        number, chunk = numbered_chunk
+        instruction = _build_instruction(
+            system_prompt, user_prompt,
+            f"This is part {number} of {total} of a long video transcript. "
+            f"Summarize only this part:\n{chunk}"
+        )
+        return _generate_json(client, model_name, instruction)
 
-        return json.loads(text_response.strip())
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, total))) as executor:
+        partials = list(executor.map(summarize_chunk, enumerate(chunks, start=1)))
+
+    partial_text = "\n\n".join(
+        f"Part {number}:\n{partial.get('summary', '')}\n"
+        f"Keywords: {', '.join(partial.get('keywords', []))}"
+        for number, partial in enumerate(partials, start=1)
+    )
+    instruction = _build_instruction(
+        system_prompt, user_prompt,
+        "The video transcript was too long and has been summarized in parts. "
+        "Merge these partial summaries into one summary of the whole video "
+        f"and one deduplicated keyword list:\n{partial_text}"
+    )
+    return _generate_json(client, model_name, instruction)
+
+def analyze_transcript(transcript_text, system_prompt, user_prompt, config, client=None, cache=None, model=None):
+    """
+    Sends text to the AI provider of `client` (Gemini by default) for analysis.
+    Returns a dictionary with 'summary' and 'keywords'.
+    `model` overrides ai_settings.model, e.g. for per-subscription routing.
+    With a `cache`, results are looked up by a hash of model, prompts and transcript.
+    """
+    model_name = model or config['ai_settings'].get('model', DEFAULT_MODEL)
+
+    cache_key = None
+    if cache is not None:
+        cache_key = transcript_cache_key(model_name, system_prompt, user_prompt, transcript_text)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if client is None:
+        client = GeminiClient()
+
+    # Fail early on a missing API key
+    client.check(model_name)
+
+    ai_settings = config['ai_settings']
+    chunk_max_tokens = ai_settings.get('chunk_max_tokens', DEFAULT_CHUNK_MAX_TOKENS)
+
+    try:
+        if chunk_max_tokens and estimate_tokens(transcript_text) > chunk_max_tokens:
+            chunks = split_transcript(transcript_text, chunk_max_tokens)
+            print(f"Long transcript, analyzing in {len(chunks)} chunks...")
+            parallelism = ai_settings.get('chunk_parallelism', DEFAULT_CHUNK_PARALLELISM)
+            result = _analyze_chunked(chunks, system_prompt, user_prompt, model_name, client, parallelism)
+        else:
+            instruction = build_transcript_prompt(system_prompt, user_prompt, transcript_text)
+            result = _generate_json(client, model_name, instruction)
     except Exception as e:
         print(f"AI Analysis failed: {e}")
         # Return fallback structure
         return {
             "summary": f"AI Analysis failed: {e}",
-            "keywords": []
+            "keywords": [],
+            "failed": True
         }
 
-def analyze_audio(audio_path, system_prompt, user_prompt, config):
+    if cache is not None:
+        cache.put(cache_key, result)
+    return result
+
+def analyze_audio(audio_path, system_prompt, user_prompt, config, client=None, cache=None, model=None):
     """
     Uploads audio to Gemini and analyzes it.
+    With a `cache`, results are looked up by a hash of model, prompts and audio content.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in .env!")
+    model_name = model or config['ai_settings'].get('model', DEFAULT_MODEL)
 
-    genai.configure(api_key=api_key)
+    cache_key = None
+    if cache is not None:
+        cache_key = audio_cache_key(model_name, system_prompt, user_prompt, audio_path)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-    model_name = config['ai_settings'].get('model', 'gemini-1.5-flash')
-    model = genai.GenerativeModel(model_name)
+    if client is None:
+        client = GeminiClient()
+
+    # Fail early on a missing API key
+    client.check(model_name)
 
     # Upload file
     print(f"Uploading audio file {audio_path} to Gemini...")
     try:
-        audio_file = genai.upload_file(audio_path)
+        audio_file = client.upload_file(audio_path)
     except Exception as e:
         return {
             "summary": f"Audio Upload failed: {e}",
-            "keywords": []
+            "keywords": [],
+            "failed": True
         }
 
-    instruction = (
-        f"{system_prompt}\n"
-        f"Specific instructions: {user_prompt}\n\n"
-        f"Please provide the output in the following JSON format:\n"
-        f"{{\n"
-        f"  \"summary\": \"The summary of the video...\",\n"
-        f"  \"keywords\": [\"keyword1\", \"keyword2\", ...]\n"
-        f"}}\n\n"
-        f"Analyze the attached audio file."
-    )
+    instruction = _build_instruction(system_prompt, user_prompt, "Analyze the attached audio file.")
 
     try:
-        response = model.generate_content([instruction, audio_file])
-        text_response = response.text
-
-        # Simple cleanup
-        if text_response.startswith("```json"):
-            text_response = text_response.replace("```json", "", 1)
-        elif text_response.startswith("```"):
-            text_response = text_response.replace("```", "", 1)
-
-        if text_response.endswith("```"):
-            text_response = text_response.rsplit("```", 1)[0]
-
-        return json.loads(text_response.strip())
+        response = client.generate(model_name, [instruction, audio_file])
+        result = _parse_response(response.text)
     except Exception as e:
+        # The upload is kept, so a retry doesn't have to upload again
         print(f"AI Audio Analysis failed: {e}")
         return {
             "summary": f"AI Audio Analysis failed: {e}",
-            "keywords": []
+            "keywords": [],
+            "failed": True
         }
+
+    client.finish_file(audio_file)
+
+    if cache is not None:
+        cache.put(cache_key, result)
+    return result
@@ -0,0 +1,66 @@
+import os
+import shutil
+import subprocess
+
+DEFAULT_SAMPLE_RATE = 16000
+DEFAULT_BITRATE = '32k'
+DEFAULT_SILENCE_THRESHOLD_DB = -40
+DEFAULT_SILENCE_MIN_DURATION = 1.0
+
+def build_ffmpeg_command(input_path, output_path, opts):
+    """
+    ffmpeg call that converts to mono at a low sample rate and removes every
+    silence longer than `silence_min_duration` seconds.
+    """
+    sample_rate = opts.get('audio_sample_rate', DEFAULT_SAMPLE_RATE)
+    bitrate = opts.get('audio_bitrate', DEFAULT_BITRATE)
+    threshold = opts.get('silence_threshold_db', DEFAULT_SILENCE_THRESHOLD_DB)
+    min_duration = opts.get('silence_min_duration', DEFAULT_SILENCE_MIN_DURATION)
+
+    silence_filter = (
+        f"silenceremove=stop_periods=-1:stop_duration={min_duration}:stop_threshold={threshold}dB"
+    )
+    return [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-i', input_path,
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-af', silence_filter,
+        '-c:a', 'libmp3lame', '-b:a', bitrate,
+        output_path
+    ]
+
+def preprocess_for_upload(input_path, output_path, opts):
+    """
+    Shrinks speech audio before it is uploaded for analysis.
+    Returns output_path, or input_path if ffmpeg is missing or fails.
+    """
+    if os.path.exists(output_path):
+        return output_path
+
+    if not shutil.which('ffmpeg'):
+        print("ffmpeg not found, uploading the original audio.")
+        return input_path
+
+    tmp_path = output_path + '.tmp.mp3'
+    try:
+        subprocess.run(build_ffmpeg_command(input_path, tmp_path, opts), check=True,
+                       capture_output=True)
+        os.replace(tmp_path, output_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Audio preprocessing failed ({e}), uploading the original audio.")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return input_path
+
+    before = os.path.getsize(input_path)
+    after = os.path.getsize(output_path)
+    print(f"Audio preprocessed: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    return output_path
+
+def encode_mp3(input_path, output_path, bitrate='64k'):
+    """Encodes an audio file (e.g. the WAV of an offline TTS engine) to mp3 with ffmpeg."""
+    if not shutil.which('ffmpeg'):
+        raise RuntimeError("ffmpeg not found, needed to encode offline TTS audio")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', input_path,
+                    '-c:a', 'libmp3lame', '-b:a', bitrate, output_path],
+                   check=True, capture_output=True)
@@ -0,0 +1,154 @@
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class LocalBatch:
+    """
+    Stand-in for a provider batch endpoint: runs the requests through the normal
+    client (with its concurrency and rate limits) and returns the results on poll.
+    Used for providers without a batch API and in tests.
+    """
+
+    def __init__(self, client, max_workers=4):
+        self.client = client
+        self.max_workers = max_workers
+        self._results = {}
+
+    def submit(self, model_name, requests):
+        """`requests` is a list of (custom_id, prompt). Returns a batch id."""
+        def run(request):
+            custom_id, prompt = request
+            try:
+                return custom_id, self.client.generate_text(model_name, prompt)
+            except Exception as e:
+                print(f"Batch request {custom_id} failed: {e}")
+                return custom_id, None
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            results = dict(executor.map(run, requests))
+        batch_id = f"local-{len(self._results) + 1}"
+        self._results[batch_id] = {k: v for k, v in results.items() if v is not None}
+        return batch_id
+
+    def is_done(self, batch_id):
+        return True
+
+    def results(self, batch_id):
+        """Returns a dict custom_id -> answer text of the successful requests."""
+        return self._results.pop(batch_id)
+
+class OpenAIBatch:
+    """OpenAI Batch API: uploads the requests as JSONL and reads the output file."""
+
+    def __init__(self, client):
+        self.sdk = client.get_sdk_client()
+
+    def submit(self, model_name, requests):
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": model_name, "messages": [{"role": "user", "content": prompt}]}
+            })
+            for custom_id, prompt in requests
+        ]
+        batch_file = self.sdk.files.create(
+            file=("batch.jsonl", io.BytesIO("\n".join(lines).encode('utf-8'))),
+            purpose="batch"
+        )
+        batch = self.sdk.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def is_done(self, batch_id):
+        status = self.sdk.batches.retrieve(batch_id).status
+        return status in ('completed', 'failed', 'expired', 'cancelled')
+
+    def results(self, batch_id):
+        batch = self.sdk.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        results = {}
+        for line in self.sdk.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get('response') or {}
+            if response.get('status_code') == 200:
+                results[item['custom_id']] = response['body']['choices'][0]['message']['content']
+        return results
+
+class AnthropicBatch:
+    """Anthropic Message Batches API."""
+
+    def __init__(self, client):
+        self.sdk = client.get_sdk_client()
+        self.max_tokens = client.max_tokens
+
+    def submit(self, model_name, requests):
+        batch = self.sdk.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": model_name,
+                    "max_tokens": self.max_tokens,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            }
+            for custom_id, prompt in requests
+        ])
+        return batch.id
+
+    def is_done(self, batch_id):
+        return self.sdk.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id):
+        results = {}
+        for item in self.sdk.messages.batches.results(batch_id):
+            if item.result.type == "succeeded":
+                results[item.custom_id] = item.result.message.content[0].text
+        return results
+
+BATCH_CLASSES = {
+    'openai': OpenAIBatch,
+    'anthropic': AnthropicBatch,
+}
+
+def create_batch(provider, client, local_workers=4):
+    """Batch endpoint of the provider, or the local stand-in if it has none (e.g. Gemini in this SDK)."""
+    if provider in BATCH_CLASSES:
+        return BATCH_CLASSES[provider](client)
+    return LocalBatch(client, local_workers)
+
+def submit_all(jobs, poll_interval=60):
+    """
+    `jobs` is a list of (batch, model_name, requests). Submits every batch before waiting
+    for any of them, so the providers work on them at the same time, then polls all of
+    them together. Yields (index into jobs, results) as the batches finish.
+    """
+    # Local batches run while being submitted, so the remote ones are submitted first
+    order = sorted(range(len(jobs)), key=lambda i: isinstance(jobs[i][0], LocalBatch))
+    pending = {}
+    for i in order:
+        endpoint, model_name, requests = jobs[i]
+        pending[i] = endpoint.submit(model_name, requests)
+        print(f"Submitted batch {pending[i]} with {len(requests)} requests ({model_name}).")
+
+    while pending:
+        for i, batch_id in list(pending.items()):
+            endpoint = jobs[i][0]
+            if endpoint.is_done(batch_id):
+                del pending[i]
+                yield i, endpoint.results(batch_id)
+        if pending:
+            time.sleep(poll_interval)
+
+def submit_and_wait(batch, model_name, requests, poll_interval=60):
+    """Submits the requests, waits until the batch is done and returns its results."""
+    for _, results in submit_all([(batch, model_name, requests)], poll_interval):
+        return results
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from src import storage
+
+CACHE_DIR = "cache"
+
+def hash_key(*parts):
+    """Builds a cache key from strings; the parts are length-prefixed so they can't run together."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode('utf-8')
+        h.update(f"{len(data)}:".encode('ascii'))
+        h.update(data)
+    return h.hexdigest()
+
+def hash_file(path):
+    """Returns the sha256 of a file's content, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class DiskCache:
+    """
+    Size-bounded LRU cache on disk, one file per entry.
+    The file modification time is the last access time, so the LRU order survives
+    restarts; in memory the entries are kept in that order with a running total size.
+    When the cache grows beyond `max_bytes`, the least recently used entries are deleted.
+    """
+
+    def __init__(self, name, max_bytes, extension='.json'):
+        self.directory = os.path.join(CACHE_DIR, name)
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # path -> size, least recently used first
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(self.extension):
+                stat = os.stat(os.path.join(self.directory, filename))
+                entries.append((stat.st_mtime, os.path.join(self.directory, filename), stat.st_size))
+        self._sizes = OrderedDict((path, size) for _, path, size in sorted(entries))
+        self._total = sum(self._sizes.values())
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def get_path(self, key):
+        """Returns the path of a cached entry (counting a hit) or None (counting a miss)."""
+        path = self.path_for(key)
+        with self._lock:
+            if path in self._sizes and os.path.exists(path):
+                os.utime(path)
+                self._sizes.move_to_end(path)
+                self.hits += 1
+                return path
+            self._total -= self._sizes.pop(path, 0)
+            self.misses += 1
+            return None
+
+    def add_path(self, key):
+        """Registers a file that was written to path_for(key) and evicts old entries."""
+        path = self.path_for(key)
+        with self._lock:
+            self._total -= self._sizes.pop(path, 0)
+            self._sizes[path] = os.path.getsize(path)
+            self._total += self._sizes[path]
+            self._evict()
+
+    def get(self, key):
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, value):
+        path = self.path_for(key)
+        # Atomic, so a crash can't leave a truncated entry; a lost entry is only a cache miss
+        storage.atomic_write(path, json.dumps(value).encode('utf-8'), fsync=False)
+        self.add_path(key)
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._sizes:
+            path, size = self._sizes.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def print_stats(self, label):
+        size_mb = self._total / (1024 * 1024)
+        print(f"{label} cache: {self.hits} hits, {self.misses} misses, "
+              f"{self.evictions} evictions, {len(self._sizes)} entries ({size_mb:.1f} MB)")
@@ -24,16 +24,49 @@ def generate_dummy_configs():
                 "host": "smtp.example.com",
                 "port": 587,
                 "user": "me@example.com",
-                "receiver": "you@example.com"
+                "receiver": "you@example.com",
+                "starttls": True,
+                "max_email_mb": 20
             },
             "ai_settings": {
-                "model": "gemini-1.5-flash"
+                "provider": "google",
+                "model": "gemini-1.5-flash",
+                "chunk_max_tokens": 100000,
+                "chunk_parallelism": 4,
+                "cache_max_mb": 100,
+                "batch_poll_seconds": 60,
+                "providers": {
+                    "google": {"max_concurrent": 4, "requests_per_minute": 60, "tokens_per_minute": 1000000},
+                    "openai": {"max_concurrent": 4, "requests_per_minute": 60, "tokens_per_minute": 200000},
+                    "anthropic": {"max_concurrent": 2, "requests_per_minute": 30, "tokens_per_minute": 100000}
+                }
             },
             "working_options": {
                 "enable_tts": True,
                 "tts_lang": "en",
+                "tts_engine": "gtts",
+                "tts_processes": 4,
+                "tts_cache_max_mb": 200,
                 "max_videos_per_channel": 3,
-                "allow_audio_download_fallback": True
+                "max_parallel_feeds": 8,
+                "daemon_min_interval_minutes": 5,
+                "daemon_max_interval_hours": 24,
+                "daemon_jitter": 0.1,
+                "max_parallel_transcripts": 4,
+                "max_parallel_tts": 2,
+                "storage_backend": "files",
+                "storage_compression": "gzip",
+                "storage_compression_level": 6,
+                "storage_fsync": "batch",
+                "allow_audio_download_fallback": True,
+                "max_parallel_downloads": 2,
+                "keep_native_audio": False,
+                "preprocess_audio": True,
+                "audio_sample_rate": 16000,
+                "audio_bitrate": "32k",
+                "silence_threshold_db": -40,
+                "silence_min_duration": 1.0,
+                "transcript_languages": ["de", "en"]
             }
         }
         with open(GENERAL_CONFIG_FILE, 'w', encoding='utf-8') as f:
@@ -49,7 +82,8 @@ def generate_dummy_configs():
                 {
                     "channel_name": "Example Channel",
                     "channel_id": "UCxxxxxxxxxxxx",
-                    "user_prompt": "Focus on technical details."
+                    "user_prompt": "Focus on technical details.",
+                    "transcript_languages": ["en"]
                 }
             ]
         }
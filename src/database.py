@@ -1,24 +1,72 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 
 DB_NAME = "youtube_assistant.db"
 
+# One connection per run, shared by all threads and guarded by _lock
+_conn = None
+_lock = threading.RLock()
+_depth = 0
+
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Returns the shared connection, opening it (in WAL mode) on first use."""
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+            _conn.execute('PRAGMA journal_mode=WAL')
+            _conn.execute('PRAGMA synchronous=NORMAL')
+        return _conn
 
-def init_db():
-    conn = get_connection()
-    c = conn.cursor()
+def close_connection():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: yields a cursor and commits once at the end.
+    Nested transactions join the outer one, so several calls can share one commit.
+    """
+    global _depth
+    with _lock:
+        conn = get_connection()
+        _depth += 1
+        try:
+            yield conn.cursor()
+        except BaseException:
+            _depth -= 1
+            if _depth == 0:
+                conn.rollback()
+            raise
+        _depth -= 1
+        if _depth == 0:
+            conn.commit()
 
+def _migration_1_base_schema(c):
     # Channels table
     c.execute('''
         CREATE TABLE IF NOT EXISTS channels (
             id TEXT PRIMARY KEY,
             name TEXT,
-            user_prompt TEXT
+            user_prompt TEXT,
+            feed_etag TEXT,
+            feed_modified TEXT
         )
     ''')
 
+    # Add feed cache columns to channels tables created by older versions
+    c.execute('PRAGMA table_info(channels)')
+    columns = [row[1] for row in c.fetchall()]
+    for column in ('feed_etag', 'feed_modified'):
+        if column not in columns:
+            c.execute(f'ALTER TABLE channels ADD COLUMN {column} TEXT')
+
     # Videos table
     c.execute('''
         CREATE TABLE IF NOT EXISTS videos (
@@ -42,72 +90,280 @@ def init_db():
         )
     ''')
 
-    conn.commit()
-    conn.close()
+def _migration_2_indexes(c):
+    # Remove duplicate keywords left by older versions before enforcing uniqueness
+    c.execute('''
+        DELETE FROM keywords WHERE id NOT IN (
+            SELECT MIN(id) FROM keywords GROUP BY video_id, keyword
+        )
+    ''')
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_keywords_video_keyword ON keywords(video_id, keyword)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos(published_at)')
 
-def upsert_channel(channel_id, name, user_prompt):
-    conn = get_connection()
-    c = conn.cursor()
+def _migration_3_search_index(c):
+    # Full-text index over title, summary, keywords and transcript
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+            video_id UNINDEXED,
+            title,
+            summary,
+            keywords,
+            transcript
+        )
+    ''')
+    # Backfill from existing rows; transcripts are added by migration 4 and backfill_transcripts()
+    c.execute('''
+        INSERT INTO videos_fts (video_id, title, summary, keywords, transcript)
+        SELECT v.id, v.title, v.summary,
+               (SELECT group_concat(k.keyword, ' ') FROM keywords k WHERE k.video_id = v.id),
+               ''
+        FROM videos v
+        WHERE v.id NOT IN (SELECT video_id FROM videos_fts)
+    ''')
+
+def _migration_4_transcript_backfill(c):
+    # Rows indexed without transcript by migration 3; backfill_transcripts() adds them from storage
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fts_transcript_backfill (
+            video_id TEXT PRIMARY KEY,
+            fts_rowid INTEGER
+        )
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO fts_transcript_backfill (video_id, fts_rowid)
+        SELECT video_id, rowid FROM videos_fts WHERE transcript = ''
+    ''')
+
+def _migration_5_fts_rowids(c):
+    # video_id is UNINDEXED in videos_fts, so rows are found by their rowid, kept in this table
+    c.execute('''
+        DELETE FROM videos_fts WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM videos_fts GROUP BY video_id
+        )
+    ''')
     c.execute('''
-        INSERT INTO channels (id, name, user_prompt)
-        VALUES (?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            name=excluded.name,
-            user_prompt=excluded.user_prompt
-    ''', (channel_id, name, user_prompt))
-    conn.commit()
-    conn.close()
+        CREATE TABLE IF NOT EXISTS videos_fts_rowids (
+            video_id TEXT PRIMARY KEY,
+            fts_rowid INTEGER
+        )
+    ''')
+    c.execute('INSERT OR REPLACE INTO videos_fts_rowids (video_id, fts_rowid) SELECT video_id, rowid FROM videos_fts')
+
+# Schema migrations in order; the schema version is stored in PRAGMA user_version.
+# Only append new migrations, never change existing ones.
+MIGRATIONS = [
+    _migration_1_base_schema,
+    _migration_2_indexes,
+    _migration_3_search_index,
+    _migration_4_transcript_backfill,
+    _migration_5_fts_rowids,
+]
+
+def get_schema_version():
+    with transaction() as c:
+        c.execute('PRAGMA user_version')
+        return c.fetchone()[0]
+
+def init_db():
+    """Creates the database or upgrades an existing one in place."""
+    version = get_schema_version()
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with transaction() as c:
+            migration(c)
+            c.execute(f'PRAGMA user_version = {number}')
+
+def upsert_channel(channel_id, name, user_prompt):
+    with transaction() as c:
+        c.execute('''
+            INSERT INTO channels (id, name, user_prompt)
+            VALUES (?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name=excluded.name,
+                user_prompt=excluded.user_prompt
+        ''', (channel_id, name, user_prompt))
+
+def get_feed_cache():
+    """Returns a dict channel_id -> {'etag': ..., 'modified': ...} of the last feed responses."""
+    with transaction() as c:
+        c.execute('SELECT id, feed_etag, feed_modified FROM channels')
+        rows = c.fetchall()
+    return {r[0]: {'etag': r[1], 'modified': r[2]} for r in rows}
+
+def update_feed_cache(channel_id, etag, modified):
+    with transaction() as c:
+        c.execute('UPDATE channels SET feed_etag = ?, feed_modified = ? WHERE id = ?',
+                  (etag, modified, channel_id))
+
+def get_pending_videos(channel_id, limit):
+    """Returns the latest videos of a channel that have not been emailed yet."""
+    with transaction() as c:
+        c.execute('''
+            SELECT * FROM videos
+            WHERE channel_id = ? AND (status IS NULL OR status != 'emailed')
+            ORDER BY published_at DESC
+            LIMIT ?
+        ''', (channel_id, limit))
+        return c.fetchall()
+
+def get_video_statuses(video_ids):
+    """Returns a dict video_id -> status for all given IDs that exist in the DB."""
+    video_ids = list(video_ids)
+    statuses = {}
+    with transaction() as c:
+        # Stay below SQLite's limit of host parameters per statement
+        for start in range(0, len(video_ids), 500):
+            batch = video_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            c.execute(f'SELECT id, status FROM videos WHERE id IN ({placeholders})', batch)
+            statuses.update(c.fetchall())
+    return statuses
+
+def get_upload_history(channel_ids, limit=20):
+    """Returns a dict channel_id -> published_at values of its `limit` most recent videos."""
+    channel_ids = list(channel_ids)
+    history = {channel_id: [] for channel_id in channel_ids}
+    with transaction() as c:
+        for start in range(0, len(channel_ids), 500):
+            batch = channel_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            # Uses idx_videos_channel_id; the window keeps only the newest rows per channel
+            c.execute(f'''
+                SELECT channel_id, published_at FROM (
+                    SELECT channel_id, published_at,
+                           ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY published_at DESC) AS n
+                    FROM videos
+                    WHERE channel_id IN ({placeholders}) AND published_at IS NOT NULL
+                )
+                WHERE n <= ?
+            ''', batch + [limit])
+            for channel_id, published_at in c.fetchall():
+                history[channel_id].append(published_at)
+    return history
+
+def get_videos_awaiting_analysis():
+    """Returns (video_id, channel_id, title, user_prompt) of all videos without a successful analysis."""
+    with transaction() as c:
+        c.execute('''
+            SELECT v.id, v.channel_id, v.title, ch.user_prompt
+            FROM videos v
+            LEFT JOIN channels ch ON ch.id = v.channel_id
+            WHERE v.status = 'new'
+            ORDER BY v.published_at
+        ''')
+        return c.fetchall()
 
 def get_video(video_id):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT * FROM videos WHERE id = ?', (video_id,))
-    row = c.fetchone()
-    conn.close()
-    return row
+    with transaction() as c:
+        c.execute('SELECT * FROM videos WHERE id = ?', (video_id,))
+        return c.fetchone()
 
 def add_video(video_id, channel_id, title, published_at, status='new'):
-    conn = get_connection()
-    c = conn.cursor()
-    # Using INSERT OR IGNORE to avoid errors if it already exists,
-    # though we might want to update if it exists.
-    # For now, if it exists, we assume we don't need to re-add it
-    # unless we want to update the status.
-    c.execute('''
-        INSERT OR IGNORE INTO videos (id, channel_id, title, published_at, status)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (video_id, channel_id, title, published_at, status))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        # Using INSERT OR IGNORE to avoid errors if it already exists,
+        # though we might want to update if it exists.
+        # For now, if it exists, we assume we don't need to re-add it
+        # unless we want to update the status.
+        c.execute('''
+            INSERT OR IGNORE INTO videos (id, channel_id, title, published_at, status)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (video_id, channel_id, title, published_at, status))
 
 def update_video_status(video_id, status):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('UPDATE videos SET status = ? WHERE id = ?', (status, video_id))
-    conn.commit()
-    conn.close()
+    update_videos_status([video_id], status)
+
+def update_videos_status(video_ids, status):
+    with transaction() as c:
+        c.executemany('UPDATE videos SET status = ? WHERE id = ?',
+                      [(status, video_id) for video_id in video_ids])
 
 def update_video_summary(video_id, summary):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('UPDATE videos SET summary = ? WHERE id = ?', (summary, video_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('UPDATE videos SET summary = ? WHERE id = ?', (summary, video_id))
 
 def add_keyword(video_id, keyword):
-    conn = get_connection()
-    c = conn.cursor()
-    # Check if keyword exists for this video to avoid duplicates if re-run
-    c.execute('SELECT id FROM keywords WHERE video_id = ? AND keyword = ?', (video_id, keyword))
-    if not c.fetchone():
-        c.execute('INSERT INTO keywords (keyword, video_id) VALUES (?, ?)', (keyword, video_id))
-    conn.commit()
-    conn.close()
+    add_keywords(video_id, [keyword])
+
+def add_keywords(video_id, keywords):
+    with transaction() as c:
+        # The unique index on (video_id, keyword) skips duplicates if re-run
+        c.executemany('INSERT OR IGNORE INTO keywords (keyword, video_id) VALUES (?, ?)',
+                      [(keyword, video_id) for keyword in keywords])
 
 def get_keywords_for_video(video_id):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute('SELECT keyword FROM keywords WHERE video_id = ?', (video_id,))
-    rows = c.fetchall()
-    conn.close()
+    with transaction() as c:
+        c.execute('SELECT keyword FROM keywords WHERE video_id = ?', (video_id,))
+        rows = c.fetchall()
     return [r[0] for r in rows]
+
+def index_video(video_id, title, summary, keywords, transcript):
+    """Adds or replaces a video in the full-text search index."""
+    with transaction() as c:
+        c.execute('SELECT fts_rowid FROM videos_fts_rowids WHERE video_id = ?', (video_id,))
+        row = c.fetchone()
+        fts_rowid = row[0] if row else None
+        if fts_rowid is not None:
+            c.execute('DELETE FROM videos_fts WHERE rowid = ?', (fts_rowid,))
+        c.execute('''
+            INSERT INTO videos_fts (rowid, video_id, title, summary, keywords, transcript)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (fts_rowid, video_id, title or '', summary or '', ' '.join(keywords), transcript or ''))
+        if fts_rowid is None:
+            c.execute('INSERT INTO videos_fts_rowids (video_id, fts_rowid) VALUES (?, ?)',
+                      (video_id, c.lastrowid))
+        # Indexed with the current transcript, nothing left to backfill
+        c.execute('DELETE FROM fts_transcript_backfill WHERE video_id = ?', (video_id,))
+
+def has_transcript_backfill():
+    """True while videos indexed before transcripts were searchable still wait for backfill_transcripts()."""
+    with transaction() as c:
+        c.execute('SELECT 1 FROM fts_transcript_backfill LIMIT 1')
+        return c.fetchone() is not None
+
+def backfill_transcripts(load_transcript):
+    """
+    Adds the transcripts of videos indexed without one (see migration 4) to the search index.
+    `load_transcript(video_id)` returns the saved transcript or None. Every video is tried
+    once; returns the number of transcripts added.
+    """
+    with transaction() as c:
+        c.execute('SELECT video_id, fts_rowid FROM fts_transcript_backfill')
+        rows = c.fetchall()
+        added = 0
+        for video_id, fts_rowid in rows:
+            transcript = load_transcript(video_id)
+            if not transcript:
+                continue
+            # Looked up by rowid, video_id is not indexed
+            c.execute('UPDATE videos_fts SET transcript = ? WHERE rowid = ?', (transcript, fts_rowid))
+            added += c.rowcount
+        c.execute('DELETE FROM fts_transcript_backfill')
+    return added
+
+def search_videos(query, limit=20):
+    """
+    Full-text search over title, summary, keywords and transcript, best matches first.
+    Returns (video_id, title, channel_name, published_at, snippet) tuples.
+    """
+    sql = '''
+        SELECT f.video_id, f.title, ch.name, v.published_at,
+               snippet(videos_fts, -1, '[', ']', '...', 12)
+        FROM videos_fts f
+        LEFT JOIN videos v ON v.id = f.video_id
+        LEFT JOIN channels ch ON ch.id = v.channel_id
+        WHERE videos_fts MATCH ?
+        ORDER BY bm25(videos_fts, 0, 10.0, 5.0, 5.0, 1.0)
+        LIMIT ?
+    '''
+    with transaction() as c:
+        try:
+            c.execute(sql, (query, limit))
+        except sqlite3.OperationalError:
+            # Not valid FTS syntax (e.g. "C++"): search the words as plain terms
+            terms = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+            c.execute(sql, (terms, limit))
+        return c.fetchall()
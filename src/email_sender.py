@@ -1,72 +1,207 @@
 import smtplib
 import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.audio import MIMEAudio
+import base64
+import tempfile
+import uuid
+from email import policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 from datetime import datetime
 
-def send_email(results, general_config):
-    """Sends HTML email with audio attachments."""
-    email_conf = general_config['email_settings']
-    msg = MIMEMultipart()
-    msg['From'] = email_conf['user']
-    msg['To'] = email_conf['receiver']
-    msg['Subject'] = f"{general_config['project_name']} - {datetime.now().strftime('%d.%m.%Y')}"
+DEFAULT_MAX_EMAIL_MB = 20
+# Messages up to this size stay in memory, larger ones are spooled to a temp file
+SPOOL_MAX_BYTES = 1024 * 1024
+# 57 input bytes give one 76 character base64 line
+BASE64_CHUNK = 57 * 1024
+# Headers, boundaries and the HTML frame of a digest
+MESSAGE_OVERHEAD = 4096
 
-    # HTML Body Construction
-    html_content = "<html><body>"
-    html_content += f"<h1>Your YouTube Briefing</h1>"
+def _item_html(item):
+    """HTML fragment of one report item."""
+    parts = ["<hr>", f"<h2>{item['channel']}</h2>", f"<h3><a href='{item['link']}'>{item['title']}</a></h3>"]
+
+    # Markdown to HTML (Simple)
+    summary_html = item['summary'].replace('\n', '<br>').replace('**', '<b>').replace('*', '<li>')
+    parts.append(f"<div style='background-color: #f9f9f9; padding: 15px;'>{summary_html}</div>")
+
+    # Keywords
+    if item.get('keywords'):
+        parts.append(f"<p><b>Keywords:</b> {', '.join(item['keywords'])}</p>")
+
+    if item.get('audio_file') and os.path.exists(item['audio_file']):
+        filename = os.path.basename(item['audio_file'])
+        parts.append(f"<p><i>Audio summary attached: {filename}</i></p>")
+    return ''.join(parts)
 
-    if not results:
-        html_content += "<p>No new videos processed.</p>"
+def _base64_size(size):
+    # 4 characters per 3 bytes plus CRLF per 76 character line
+    encoded = (size + 2) // 3 * 4
+    return encoded + encoded // 76 * 2 + 2
 
-    attachments = []
+def estimate_size(item):
+    """Approximate encoded size of an item in the message."""
+    size = _base64_size(len(_item_html(item).encode('utf-8'))) + 200
+    if item.get('audio_file') and os.path.exists(item['audio_file']):
+        size += _base64_size(os.path.getsize(item['audio_file'])) + 300
+    return size
 
+def split_digests(results, max_bytes):
+    """
+    Splits the items into digests whose estimated message size stays below `max_bytes`,
+    keeping their order. An item that is too large on its own gets its own digest.
+    """
+    digests = []
+    current = []
+    current_size = MESSAGE_OVERHEAD
     for item in results:
-        html_content += f"<hr>"
-        html_content += f"<h2>{item['channel']}</h2>"
-        html_content += f"<h3><a href='{item['link']}'>{item['title']}</a></h3>"
+        size = estimate_size(item)
+        if current and current_size + size > max_bytes:
+            digests.append(current)
+            current = []
+            current_size = MESSAGE_OVERHEAD
+        current.append(item)
+        current_size += size
+    if current or not digests:
+        digests.append(current)
+    return digests
 
-        # Markdown to HTML (Simple)
-        summary_html = item['summary'].replace('\n', '<br>').replace('**', '<b>').replace('*', '<li>')
-        html_content += f"<div style='background-color: #f9f9f9; padding: 15px;'>{summary_html}</div>"
+def _write_base64(out, source):
+    """Copies a binary file object base64 encoded into `out`, in chunks."""
+    for chunk in iter(lambda: source.read(BASE64_CHUNK), b''):
+        out.write(base64.encodebytes(chunk).replace(b'\n', b'\r\n'))
 
-        # Keywords
-        if item.get('keywords'):
-            html_content += f"<p><b>Keywords:</b> {', '.join(item['keywords'])}</p>"
+def write_message(out, items, headers):
+    """
+    Writes the MIME message of one digest to the binary file object `out`, one part at a time:
+    the HTML body is built in a spooled file and audio files are streamed from disk.
+    """
+    boundary = f"=={uuid.uuid4().hex}=="
+    out.write(headers.as_bytes(policy=policy.SMTP)[:-2])
+    out.write(f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n'.encode('ascii'))
 
-        if item.get('audio_file') and os.path.exists(item['audio_file']):
-            filename = os.path.basename(item['audio_file'])
-            html_content += f"<p><i>Audio summary attached: {filename}</i></p>"
-            attachments.append(item['audio_file'])
+    # HTML Body Construction
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as body:
+        body.write(b"<html><body><h1>Your YouTube Briefing</h1>")
+        if not items:
+            body.write(b"<p>No new videos processed.</p>")
+        for item in items:
+            body.write(_item_html(item).encode('utf-8'))
+        body.write(b"</body></html>")
+        body.seek(0)
 
-    html_content += "</body></html>"
-    msg.attach(MIMEText(html_content, 'html'))
+        out.write(f"--{boundary}\r\n".encode('ascii'))
+        out.write(b'Content-Type: text/html; charset="utf-8"\r\nContent-Transfer-Encoding: base64\r\n\r\n')
+        _write_base64(out, body)
 
     # Attach Audio
-    for mp3_path in attachments:
+    for item in items:
+        mp3_path = item.get('audio_file')
+        if not mp3_path or not os.path.exists(mp3_path):
+            continue
         try:
             with open(mp3_path, 'rb') as f:
                 filename = os.path.basename(mp3_path)
-                audio = MIMEAudio(f.read(), _subtype="mp3")
-                audio.add_header('Content-Disposition', 'attachment', filename=filename)
-                msg.attach(audio)
-        except Exception as e:
+                out.write(f"--{boundary}\r\n".encode('ascii'))
+                out.write(b"Content-Type: audio/mpeg\r\nContent-Transfer-Encoding: base64\r\n")
+                out.write(f'Content-Disposition: attachment; filename="{filename}"\r\n\r\n'.encode('utf-8'))
+                _write_base64(out, f)
+        except OSError as e:
             print(f"Could not attach {mp3_path}: {e}")
 
+    out.write(f"--{boundary}--\r\n".encode('ascii'))
+
+def _send_data(server, message_file):
+    """DATA command that streams the message file to the server instead of loading it."""
+    code, reply = server.docmd("data")
+    if code != 354:
+        raise smtplib.SMTPDataError(code, reply)
+
+    message_file.seek(0)
+    buffer = []
+    buffered = 0
+    for line in message_file:
+        if line.startswith(b'.'):
+            # Dot-stuffing (RFC 5321, 4.5.2)
+            line = b'.' + line
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= 64 * 1024:
+            server.send(b''.join(buffer))
+            buffer = []
+            buffered = 0
+    buffer.append(b'.\r\n')
+    server.send(b''.join(buffer))
+
+    code, reply = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, reply)
+
+def _connect(email_conf, password):
+    server = smtplib.SMTP(email_conf['host'], email_conf['port'])
+    if email_conf.get('starttls', True):
+        server.starttls()
+    server.login(email_conf['user'], password)
+    return server
+
+def send_email(results, general_config, on_sent=None):
+    """
+    Sends the report as HTML email(s) with audio attachments over one SMTP session.
+    Reports larger than email_settings.max_email_mb are split into several digests;
+    `on_sent(items)` is called after each digest that was delivered.
+    Returns True if all digests were sent.
+    """
+    email_conf = general_config['email_settings']
+    max_bytes = email_conf.get('max_email_mb', DEFAULT_MAX_EMAIL_MB) * 1024 * 1024
+    digests = split_digests(results, max_bytes)
+    receivers = [r.strip() for r in email_conf['receiver'].split(',') if r.strip()]
+    subject = f"{general_config['project_name']} - {datetime.now().strftime('%d.%m.%Y')}"
+
     # Send
+    server = None
+    sent = 0
     try:
         password = os.getenv("EMAIL_PASSWORD")
         if not password:
             raise ValueError("EMAIL_PASSWORD not found in .env!")
 
-        server = smtplib.SMTP(email_conf['host'], email_conf['port'])
-        server.starttls()
-        server.login(email_conf['user'], password)
-        server.send_message(msg)
-        server.quit()
-        print("Email sent successfully.")
-        return True
+        server = _connect(email_conf, password)
+        for number, items in enumerate(digests, 1):
+            headers = EmailMessage()
+            headers['From'] = email_conf['user']
+            headers['To'] = email_conf['receiver']
+            headers['Subject'] = subject if len(digests) == 1 else f"{subject} ({number}/{len(digests)})"
+            headers['Date'] = formatdate(localtime=True)
+            headers['Message-ID'] = make_msgid()
+            headers['MIME-Version'] = '1.0'
+
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as message_file:
+                write_message(message_file, items, headers)
+                try:
+                    code, reply = server.mail(email_conf['user'])
+                    if code != 250:
+                        raise smtplib.SMTPSenderRefused(code, reply, email_conf['user'])
+                    for receiver in receivers:
+                        code, reply = server.rcpt(receiver)
+                        if code not in (250, 251):
+                            raise smtplib.SMTPRecipientsRefused({receiver: (code, reply)})
+                    _send_data(server, message_file)
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                    # Rejected by the server, but the session is still usable for the next digest
+                    server.rset()
+                    print(f"Email Send Error (digest {number}/{len(digests)}): {e}")
+                    continue
+
+            sent += 1
+            if on_sent:
+                on_sent(items)
+        if sent == len(digests):
+            print(f"Email sent successfully ({sent} messages)." if sent > 1 else "Email sent successfully.")
     except Exception as e:
         print(f"Email Send Error: {e}")
-        return False
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+    return sent == len(digests)
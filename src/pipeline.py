@@ -0,0 +1,70 @@
+import queue
+import threading
+
+# Marker that tells a stage worker to shut down
+_STOP = object()
+
+def run_pipeline(jobs, stages):
+    """
+    Runs jobs through a sequence of stages connected by queues.
+
+    `stages` is a list of (name, func, workers) tuples. Each stage has its own
+    worker threads, so a slow stage only holds up the jobs waiting for it.
+    `func(job)` returns the job for the next stage, or None to drop it.
+    A stage raising an exception drops the job as well.
+
+    Returns the jobs that passed all stages, in their original order.
+    """
+    jobs = list(jobs)
+    if not stages:
+        return jobs
+
+    queues = [queue.Queue() for _ in stages]
+    finished = []
+    finished_lock = threading.Lock()
+
+    def worker(stage_index):
+        name, func, _ = stages[stage_index]
+        in_queue = queues[stage_index]
+        while True:
+            item = in_queue.get()
+            if item is _STOP:
+                break
+            index, job = item
+            try:
+                result = func(job)
+            except Exception as e:
+                print(f"Stage '{name}' failed: {e}")
+                result = None
+
+            if result is None:
+                continue
+            if stage_index + 1 < len(stages):
+                queues[stage_index + 1].put((index, result))
+            else:
+                with finished_lock:
+                    finished.append((index, result))
+
+    stage_threads = []
+    for stage_index, (_, _, workers) in enumerate(stages):
+        threads = [
+            threading.Thread(target=worker, args=(stage_index,), daemon=True)
+            for _ in range(max(1, workers))
+        ]
+        for t in threads:
+            t.start()
+        stage_threads.append(threads)
+
+    for index, job in enumerate(jobs):
+        queues[0].put((index, job))
+
+    # Shut stages down front to back: once all workers of a stage are done,
+    # nothing more can arrive at the next one.
+    for stage_index, threads in enumerate(stage_threads):
+        for _ in threads:
+            queues[stage_index].put(_STOP)
+        for t in threads:
+            t.join()
+
+    finished.sort(key=lambda item: item[0])
+    return [job for _, job in finished]
@@ -0,0 +1,85 @@
+import heapq
+import random
+import statistics
+from datetime import datetime, timezone
+
+DEFAULT_MIN_INTERVAL = 5 * 60
+DEFAULT_MAX_INTERVAL = 24 * 60 * 60
+# Interval for channels without upload history
+DEFAULT_INTERVAL = 60 * 60
+# A channel is polled this many times per typical gap between its uploads
+POLLS_PER_UPLOAD = 10
+DEFAULT_JITTER = 0.1
+# Number of most recent uploads used to estimate the upload frequency
+HISTORY_SIZE = 20
+
+def parse_published(value):
+    """Parses a published_at value from the feed; returns an aware datetime or None."""
+    try:
+        published = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
+def poll_interval(published_at, now, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL):
+    """
+    Seconds until a channel should be polled again, from the published_at values of its uploads.
+    The typical gap is the median gap between recent uploads, or the time since the last
+    upload if that is longer, so channels that went quiet are polled less and less often.
+    """
+    times = sorted(filter(None, (parse_published(value) for value in published_at)))
+    if not times:
+        return max(min_interval, min(DEFAULT_INTERVAL, max_interval))
+
+    since_last = (now - times[-1]).total_seconds()
+    gaps = [(b - a).total_seconds() for a, b in zip(times, times[1:])]
+    typical_gap = max(statistics.median(gaps) if gaps else since_last, since_last)
+    return max(min_interval, min(typical_gap / POLLS_PER_UPLOAD, max_interval))
+
+class Scheduler:
+    """
+    Keeps the next poll time of every channel (epoch seconds) in memory.
+    Channels are due right after being added.
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 jitter=DEFAULT_JITTER, rng=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.next_poll = {}
+        self.intervals = {}
+        self._heap = []
+
+    def add(self, channel_id, when=0):
+        self.next_poll[channel_id] = when
+        heapq.heappush(self._heap, (when, channel_id))
+
+    def due(self, now):
+        """
+        Returns the channels whose poll time has come, most overdue first.
+        They are unscheduled until reschedule() is called for them.
+        """
+        channels = []
+        while self._heap and self._heap[0][0] <= now:
+            when, channel_id = heapq.heappop(self._heap)
+            # Skip stale heap entries of rescheduled channels
+            if self.next_poll.get(channel_id) == when:
+                del self.next_poll[channel_id]
+                channels.append(channel_id)
+        return channels
+
+    def reschedule(self, channel_id, published_at, now):
+        """Sets the next poll time from the channel's upload history, with random jitter."""
+        interval = poll_interval(published_at, datetime.fromtimestamp(now, timezone.utc),
+                                 self.min_interval, self.max_interval)
+        self.intervals[channel_id] = interval
+        interval *= self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+        self.add(channel_id, now + interval)
+
+    def next_time(self):
+        """Earliest next poll time, or None if no channel is scheduled."""
+        return min(self.next_poll.values()) if self.next_poll else None
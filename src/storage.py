@@ -1,7 +1,225 @@
 import os
+import gzip
 import json
+import sqlite3
+import threading
+import time
+import zlib
 
 DATA_DIR = "data"
+BLOB_DB_NAME = "artifacts.db"
+
+def _zstd_compress(data, level):
+    import zstandard
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+def _zstd_decompress(data):
+    import zstandard
+    return zstandard.ZstdDecompressor().decompress(data)
+
+# name -> (file suffix, compress(data, level), decompress(data))
+COMPRESSORS = {
+    'gzip': ('.gz', lambda data, level: gzip.compress(data, compresslevel=level), gzip.decompress),
+    'zstd': ('.zst', _zstd_compress, _zstd_decompress),
+}
+
+# Errors that mean an artifact is truncated or otherwise unreadable
+CORRUPT_ERRORS = (ValueError, EOFError, zlib.error, gzip.BadGzipFile)
+try:
+    import zstandard
+    CORRUPT_ERRORS += (zstandard.ZstdError,)
+except ImportError:
+    # Only needed for storage_compression 'zstd'
+    pass
+
+def atomic_write(filepath, data, fsync=True):
+    """
+    Writes to a temporary file next to `filepath` and renames it into place,
+    so a crash leaves either the old or the new content, never a truncated file.
+    """
+    tmp_path = f"{filepath}.tmp{os.getpid()}_{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Directories can't be fsynced on every platform (e.g. Windows)
+        pass
+    finally:
+        os.close(fd)
+
+class FileSystemBackend:
+    """
+    Stores every step artifact as its own file in data/<video_id>/.
+    With a compression, files get a .gz/.zst suffix; plain files are still read.
+
+    Writes are atomic. `fsync` is 'always' (sync every file), 'batch' (sync all
+    files written since the last flush() at once) or 'never'.
+    """
+
+    def __init__(self, compression='none', level=6, fsync='batch'):
+        if compression != 'none' and compression not in COMPRESSORS:
+            raise ValueError(f"Unknown storage_compression: {compression}")
+        if fsync not in ('always', 'batch', 'never'):
+            raise ValueError(f"Unknown storage_fsync: {fsync}")
+        self.compression = compression
+        self.level = level
+        self.fsync = fsync
+        # Keep uncompressed files readable for tracing
+        self.json_indent = 4 if compression == 'none' else None
+        self._unsynced = set()
+        self._lock = threading.Lock()
+
+    def write(self, video_id, filename, data):
+        folder = ensure_video_folder(video_id)
+        filepath = os.path.join(folder, filename)
+        if self.compression != 'none':
+            suffix, compress, _ = COMPRESSORS[self.compression]
+            data = compress(data, self.level)
+            filepath += suffix
+
+        atomic_write(filepath, data, fsync=self.fsync == 'always')
+        if self.fsync == 'batch':
+            with self._lock:
+                self._unsynced.add(filepath)
+        elif self.fsync == 'always':
+            _fsync_path(folder)
+
+        # Remove other variants of the file so they can't shadow the new content
+        for variant in _variants(folder, filename):
+            if variant != filepath and os.path.exists(variant):
+                os.remove(variant)
+        return filepath
+
+    def read(self, video_id, filename):
+        folder = os.path.join(DATA_DIR, video_id)
+        for variant in _variants(folder, filename):
+            if os.path.exists(variant):
+                with open(variant, 'rb') as f:
+                    return _decompress_file(variant, f.read())
+        return None
+
+    def flush(self):
+        """Syncs the files written since the last flush, and their folders, to disk."""
+        with self._lock:
+            paths = self._unsynced
+            self._unsynced = set()
+        for path in sorted(paths):
+            if os.path.exists(path):
+                _fsync_path(path)
+        for folder in sorted({os.path.dirname(p) for p in paths}):
+            _fsync_path(folder)
+
+    def quarantine(self, video_id, filename):
+        """Renames an unreadable artifact to <name>.corrupt-<timestamp> and returns the new path."""
+        folder = os.path.join(DATA_DIR, video_id)
+        for variant in _variants(folder, filename):
+            if os.path.exists(variant):
+                target = f"{variant}.corrupt-{int(time.time())}"
+                os.replace(variant, target)
+                return target
+        return None
+
+def _variants(folder, filename):
+    base = os.path.join(folder, filename)
+    return [base] + [base + suffix for suffix, _, _ in COMPRESSORS.values()]
+
+def _decompress_file(filepath, data):
+    for suffix, _, decompress in COMPRESSORS.values():
+        if filepath.endswith(suffix):
+            return decompress(data)
+    return data
+
+class SQLiteBlobBackend:
+    """Stores all step artifacts zlib-compressed in one SQLite file (data/artifacts.db)."""
+
+    json_indent = None
+
+    def __init__(self, path=None, level=6):
+        self.path = path or os.path.join(DATA_DIR, BLOB_DB_NAME)
+        self.level = level
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS artifacts (
+                video_id TEXT,
+                name TEXT,
+                data BLOB,
+                PRIMARY KEY(video_id, name)
+            )
+        ''')
+        self._conn.commit()
+
+    def write(self, video_id, filename, data):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO artifacts (video_id, name, data) VALUES (?, ?, ?)',
+                (video_id, filename, zlib.compress(data, self.level))
+            )
+            self._conn.commit()
+        return f"{self.path}:{video_id}/{filename}"
+
+    def read(self, video_id, filename):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM artifacts WHERE video_id = ? AND name = ?', (video_id, filename)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0])
+
+    def flush(self):
+        # Every write is already committed
+        pass
+
+    def quarantine(self, video_id, filename):
+        target = f"{filename}.corrupt-{int(time.time())}"
+        with self._lock:
+            self._conn.execute(
+                'UPDATE OR REPLACE artifacts SET name = ? WHERE video_id = ? AND name = ?',
+                (target, video_id, filename)
+            )
+            self._conn.commit()
+        return f"{self.path}:{video_id}/{target}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_backend = FileSystemBackend()
+
+def create_backend(opts):
+    """Creates the backend selected by working_options.storage_backend ('files' or 'sqlite')."""
+    name = opts.get('storage_backend', 'files')
+    level = opts.get('storage_compression_level', 6)
+    if name == 'files':
+        # Uncompressed unless configured, like FileSystemBackend(), so existing installs keep plain files
+        return FileSystemBackend(opts.get('storage_compression', 'none'), level,
+                                 opts.get('storage_fsync', 'batch'))
+    if name == 'sqlite':
+        return SQLiteBlobBackend(level=level)
+    raise ValueError(f"Unknown storage_backend: {name}")
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+def get_backend():
+    return _backend
 
 def ensure_video_folder(video_id):
     """Creates the folder structure data/<video_id> if it doesn't exist."""
@@ -9,35 +227,101 @@ def ensure_video_folder(video_id):
     os.makedirs(path, exist_ok=True)
     return path
 
+def flush():
+    """Makes all step artifacts written so far durable (see FileSystemBackend fsync modes)."""
+    _backend.flush()
+
+def _load(video_id, filename, decode):
+    """
+    Reads and decodes an artifact. A corrupt artifact (e.g. truncated by a crash)
+    is quarantined and treated as missing, so the step simply runs again.
+    """
+    try:
+        data = _backend.read(video_id, filename)
+        if data is None:
+            return None
+        return decode(data)
+    except CORRUPT_ERRORS as e:
+        target = _backend.quarantine(video_id, filename)
+        print(f"Corrupt artifact {video_id}/{filename} ({e}), moved to {target}")
+        return None
+
 def save_step_json(video_id, filename, data):
-    folder = ensure_video_folder(video_id)
-    filepath = os.path.join(folder, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
-    return filepath
+    text = json.dumps(data, indent=_backend.json_indent)
+    return _backend.write(video_id, filename, text.encode('utf-8'))
 
 def load_step_json(video_id, filename):
-    folder = ensure_video_folder(video_id)
-    filepath = os.path.join(folder, filename)
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+    return _load(video_id, filename, lambda data: json.loads(data.decode('utf-8')))
 
 def save_step_text(video_id, filename, text):
-    folder = ensure_video_folder(video_id)
-    filepath = os.path.join(folder, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(text)
-    return filepath
+    return _backend.write(video_id, filename, text.encode('utf-8'))
 
 def load_step_text(video_id, filename):
-    folder = ensure_video_folder(video_id)
-    filepath = os.path.join(folder, filename)
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
-    return None
+    return _load(video_id, filename, lambda data: data.decode('utf-8'))
 
 def get_file_path(video_id, filename):
+    """Path for binary files (audio), which always stay in data/<video_id>/."""
     return os.path.join(DATA_DIR, video_id, filename)
+
+def _step_files(folder):
+    """Returns the names of the step artifacts in a folder, without compression suffix."""
+    names = set()
+    for filename in os.listdir(folder):
+        for suffix, _, _ in COMPRESSORS.values():
+            if filename.endswith(suffix):
+                filename = filename[:-len(suffix)]
+                break
+        if filename.endswith(('.json', '.txt')):
+            names.add(filename)
+    return sorted(names)
+
+def compress_existing(compression, level=6):
+    """
+    Rewrites all step artifacts in the data/ tree with the given compression.
+    Returns the number of rewritten files.
+    """
+    source = FileSystemBackend()
+    target = FileSystemBackend(compression, level)
+    suffix = COMPRESSORS[compression][0]
+    if not os.path.isdir(DATA_DIR):
+        return 0
+
+    rewritten = 0
+    for video_id in sorted(os.listdir(DATA_DIR)):
+        folder = os.path.join(DATA_DIR, video_id)
+        if not os.path.isdir(folder):
+            continue
+        for filename in _step_files(folder):
+            if os.path.exists(os.path.join(folder, filename + suffix)):
+                continue
+            target.write(video_id, filename, source.read(video_id, filename))
+            rewritten += 1
+    target.flush()
+    return rewritten
+
+def migrate_to_blob_store(target):
+    """
+    Imports the .json/.txt step files (plain or compressed) of the data/ tree into
+    `target` and deletes each file once it reads back identically. Audio files stay where they are.
+    Returns the number of imported files.
+    """
+    if not os.path.isdir(DATA_DIR):
+        return 0
+
+    source = FileSystemBackend()
+    imported = 0
+    for video_id in sorted(os.listdir(DATA_DIR)):
+        folder = os.path.join(DATA_DIR, video_id)
+        if not os.path.isdir(folder):
+            continue
+        for filename in _step_files(folder):
+            data = source.read(video_id, filename)
+            target.write(video_id, filename, data)
+            if target.read(video_id, filename) == data:
+                for variant in _variants(folder, filename):
+                    if os.path.exists(variant):
+                        os.remove(variant)
+                imported += 1
+        if not os.listdir(folder):
+            os.rmdir(folder)
+    return imported
@@ -4,7 +4,7 @@ import google.generativeai as genai
 import openai
 import anthropic
 from gtts import gTTS
-from src import email_sender
+from src import email_sender, ai
 
 def test_email_config(gen_conf):
     """Sends a test email to verify configuration."""
@@ -77,13 +77,7 @@ def test_ai_connections(subscriptions):
             continue
 
         # Normalize provider
-        provider = provider.lower().strip()
-        if provider == 'gemini':
-            provider = 'google'
-        elif provider == 'chatgpt':
-            provider = 'openai'
-        elif provider == 'claude':
-            provider = 'anthropic'
+        provider = ai.normalize_provider(provider)
 
         unique_combinations.add((provider, model))
 
@@ -1,13 +1,235 @@
-from gtts import gTTS
 import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from src import audio, cache as disk_cache, storage
 
-def generate_audio_summary(text, filepath, lang='de'):
-    """Generates an MP3 file from text and saves it to the specified filepath."""
+DEFAULT_ENGINE = 'gtts'
+DEFAULT_CACHE_MAX_MB = 200
+# Worker processes for the offline engines
+DEFAULT_PROCESSES = 4
+# Sentences are merged into segments of up to this many characters
+SEGMENT_MAX_CHARS = 400
+
+class GTTSEngine:
+    """Google Translate TTS (online). Produces mp3 segments."""
+
+    name = 'gtts'
+    segment_suffix = '.mp3'
+    # Network-bound: worker processes would only send more parallel requests to Google
+    cpu_bound = False
+
+    def synthesize(self, text, lang, path):
+        from gtts import gTTS
+        gTTS(text=text, lang=lang, slow=False).save(path)
+
+class CommandEngine:
+    """Offline engine that runs a local binary writing a WAV file."""
+
+    segment_suffix = '.wav'
+    binaries = ()
+    cpu_bound = True
+
+    def find_binary(self):
+        for binary in self.binaries:
+            if shutil.which(binary):
+                return binary
+        raise RuntimeError(f"TTS engine '{self.name}' needs one of: {', '.join(self.binaries)}")
+
+    def command(self, binary, text, lang, path):
+        raise NotImplementedError
+
+    def synthesize(self, text, lang, path):
+        subprocess.run(self.command(self.find_binary(), text, lang, path), check=True, capture_output=True)
+
+class EspeakEngine(CommandEngine):
+    name = 'espeak'
+    binaries = ('espeak-ng', 'espeak')
+
+    def command(self, binary, text, lang, path):
+        return [binary, '-v', lang, '-w', path, text]
+
+class PicoEngine(CommandEngine):
+    name = 'pico'
+    binaries = ('pico2wave',)
+    # pico2wave only knows these voices
+    VOICES = {'de': 'de-DE', 'en': 'en-US', 'es': 'es-ES', 'fr': 'fr-FR', 'it': 'it-IT'}
+
+    def command(self, binary, text, lang, path):
+        return [binary, '-l', self.VOICES.get(lang, lang), '-w', path, text]
+
+ENGINES = {
+    'gtts': GTTSEngine,
+    'espeak': EspeakEngine,
+    'pico': PicoEngine,
+}
+
+def create_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown tts_engine: {name}")
+    return ENGINES[name]()
+
+def clean_text(text):
+    """Removes markdown characters that would be read out."""
+    return text.replace('*', '').replace('#', '')
+
+def split_sentences(text, max_chars=None):
+    """
+    Splits text into segments at sentence ends. Short sentences are merged up to
+    `max_chars` (default SEGMENT_MAX_CHARS); longer sentences are split at whitespace.
+    """
+    max_chars = max_chars or SEGMENT_MAX_CHARS
+    segments = []
+    current = ''
+    for sentence in re.split(r'(?<=[.!?:;])\s+|\n+', text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            segments.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+def _synthesize_segment(engine_name, text, lang, path):
+    # Runs in a worker process, so it only gets picklable arguments
+    create_engine(engine_name).synthesize(text, lang, path)
+    return path
+
+def _concatenate(segment_paths, filepath, suffix):
+    if suffix == '.mp3':
+        # MP3 is a sequence of independent frames, so the segments can simply be appended
+        with open(filepath, 'wb') as out:
+            for path in segment_paths:
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        return
+
+    combined = filepath + '.wav'
+    try:
+        with wave.open(combined, 'wb') as out:
+            for i, path in enumerate(segment_paths):
+                with wave.open(path, 'rb') as segment:
+                    if i == 0:
+                        out.setparams(segment.getparams())
+                    out.writeframes(segment.readframes(segment.getnframes()))
+        audio.encode_mp3(combined, filepath)
+    finally:
+        if os.path.exists(combined):
+            os.remove(combined)
+
+def generate_audio_summary(text, filepath, lang='de', engine=None, executor=None):
+    """
+    Generates an MP3 file from text and saves it to the specified filepath.
+    The text is synthesized in sentence segments, in parallel if an `executor` is given.
+    """
+    engine = engine or create_engine(DEFAULT_ENGINE)
     try:
-        clean_text = text.replace('*', '').replace('#', '')
-        tts = gTTS(text=clean_text, lang=lang, slow=False)
-        tts.save(filepath)
+        segments = split_sentences(clean_text(text))
+        if not segments:
+            raise ValueError("No text to speak")
+
+        folder = os.path.dirname(os.path.abspath(filepath))
+        with tempfile.TemporaryDirectory(dir=folder, prefix='.tts-') as tmp:
+            paths = [os.path.join(tmp, f"{i:04d}{engine.segment_suffix}") for i in range(len(segments))]
+            args = ([engine.name] * len(segments), segments, [lang] * len(segments), paths)
+            if executor is not None:
+                list(executor.map(_synthesize_segment, *args))
+            else:
+                list(map(_synthesize_segment, *args))
+
+            tmp_output = os.path.join(tmp, 'output.mp3')
+            _concatenate(paths, tmp_output, engine.segment_suffix)
+            os.replace(tmp_output, filepath)
         return True
     except Exception as e:
         print(f"TTS Error: {e}")
         return False
+
+def create_audio_cache(opts):
+    """Creates the on-disk cache for generated audio, sized by working_options.tts_cache_max_mb."""
+    max_mb = opts.get('tts_cache_max_mb', DEFAULT_CACHE_MAX_MB)
+    return disk_cache.DiskCache('tts', max_mb * 1024 * 1024, extension='.mp3')
+
+class AudioGenerator:
+    """
+    Generates summary audio for a whole run. With a `cache`, the audio is looked up by
+    a hash of engine, language and cleaned text, so identical summaries are only synthesized once.
+    Segments of the offline engines are synthesized on a pool of `processes` worker processes
+    (0: in the calling thread), started on first use; gTTS always runs in the calling thread.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, lang='de', cache=None, engine=DEFAULT_ENGINE, processes=0):
+        self.lang = lang
+        self.cache = cache
+        self.engine = create_engine(engine)
+        self.processes = processes
+        self.synthesized = 0
+        self.seconds = 0.0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if not self.processes or not self.engine.cpu_bound:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs worker threads is unsafe, and Windows has no fork
+                self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def cache_key(self, text):
+        return disk_cache.hash_key('tts', self.engine.name, self.lang, clean_text(text))
+
+    def generate(self, text, filepath):
+        """Writes the audio for `text` to `filepath`. Returns True on success."""
+        start = time.perf_counter()
+        try:
+            key = None
+            if self.cache is not None:
+                key = self.cache_key(text)
+                cached_path = self.cache.get_path(key)
+                if cached_path:
+                    shutil.copyfile(cached_path, filepath)
+                    return True
+
+            if not generate_audio_summary(text, filepath, self.lang, self.engine, self._get_executor()):
+                return False
+            with self._lock:
+                self.synthesized += 1
+            if key is not None:
+                with open(filepath, 'rb') as f:
+                    storage.atomic_write(self.cache.path_for(key), f.read(), fsync=False)
+                self.cache.add_path(key)
+            return True
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds += elapsed
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def print_stats(self):
+        print(f"TTS ({self.engine.name}, {self.lang}): {self.synthesized} synthesized, {self.seconds:.2f}s total")
+        if self.cache is not None:
+            self.cache.print_stats("TTS audio")
@@ -1,10 +1,34 @@
-import feedparser
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+import os
+import subprocess
+import threading
+from src import audio
 
-def get_new_videos(channel_id, limit=3):
-    """Fetches the latest videos via RSS Feed."""
+def get_new_videos(channel_id, limit=3, cache=None):
+    """
+    Fetches the latest videos via RSS Feed.
+    If a `cache` dict with 'etag'/'modified' is given, a conditional request is sent
+    and the dict is updated with the values of a successful response.
+    Returns None if the feed was not modified since the last request.
+    Raises ConnectionError if the feed could not be fetched.
+    """
+    import feedparser
     rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-    feed = feedparser.parse(rss_url)
+    if cache is None:
+        feed = feedparser.parse(rss_url)
+    else:
+        feed = feedparser.parse(rss_url, etag=cache.get('etag'), modified=cache.get('modified'))
+
+    status = getattr(feed, 'status', None)
+    if cache is not None and status == 304:
+        return None
+    # No status means the request failed (network, DNS, ...); the cache keeps its validators
+    if not isinstance(status, int) or not 200 <= status < 300:
+        reason = status if isinstance(status, int) else getattr(feed, 'bozo_exception', 'no response')
+        raise ConnectionError(f"Feed request failed: {reason}")
+
+    if cache is not None:
+        cache['etag'] = getattr(feed, 'etag', None)
+        cache['modified'] = getattr(feed, 'modified', None)
 
     new_videos = []
 
@@ -22,18 +46,65 @@ def get_new_videos(channel_id, limit=3):
 
     return new_videos
 
-def get_video_transcript(video_id):
-    """Fetches transcript using youtube-transcript-api."""
+DEFAULT_TRANSCRIPT_LANGUAGES = ['de', 'en']
+
+def _fetch_transcript(video_id, languages):
+    """
+    Returns (language_code, segments) of the first available transcript in `languages`.
+    Segments are dicts with 'text', 'start' and 'duration'.
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi
+    if hasattr(YouTubeTranscriptApi, 'list_transcripts'):
+        # youtube-transcript-api < 1.0
+        transcript = YouTubeTranscriptApi.list_transcripts(video_id).find_transcript(languages)
+        return transcript.language_code, transcript.fetch()
+
+    fetched = YouTubeTranscriptApi().fetch(video_id, languages=languages)
+    return fetched.language_code, fetched.to_raw_data()
+
+def get_video_transcript_segments(video_id, languages=None):
+    """
+    Fetches the transcript and keeps its structure.
+    Returns a dict with the joined 'text', the chosen 'language' and the segments as
+    parallel arrays: 'start' and 'duration' (seconds) and 'offset' (position of the
+    segment in 'text'). Returns None if no transcript is available.
+    """
+    from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['de', 'en'])
-        full_text = " ".join([t['text'] for t in transcript_list])
-        return full_text
+        language, segments = _fetch_transcript(video_id, languages or DEFAULT_TRANSCRIPT_LANGUAGES)
     except (TranscriptsDisabled, NoTranscriptFound):
         return None
     except Exception as e:
         print(f"Error fetching transcript for {video_id}: {e}")
         return None
 
+    parts = []
+    starts = []
+    durations = []
+    offsets = []
+    position = 0
+    for segment in segments:
+        offsets.append(position)
+        starts.append(round(segment['start'], 2))
+        durations.append(round(segment.get('duration', 0.0), 2))
+        parts.append(segment['text'])
+        position += len(segment['text']) + 1
+
+    return {
+        'language': language,
+        'text': " ".join(parts),
+        'start': starts,
+        'duration': durations,
+        'offset': offsets
+    }
+
+def get_video_transcript(video_id, languages=None):
+    """Fetches transcript using youtube-transcript-api."""
+    transcript = get_video_transcript_segments(video_id, languages)
+    if transcript is None:
+        return None
+    return transcript['text']
+
 def download_audio(video_id, output_path):
     """Downloads audio from a YouTube video using yt-dlp."""
     import yt_dlp
@@ -86,3 +157,121 @@ def download_audio(video_id, output_path):
     except Exception as e:
         print(f"Error downloading audio for {video_id}: {e}")
         return None
+
+# Audio streams Gemini accepts as downloaded (with keep_native_audio)
+NATIVE_AUDIO_EXTENSIONS = ('m4a', 'opus', 'webm')
+
+class DownloadManager:
+    """
+    Downloads audio for the fallback path.
+    At most `max_parallel` downloads run at once; each worker thread keeps its own
+    YoutubeDL instance (they are not thread-safe) and reuses it for later videos.
+    Partial downloads (.part files) are resumed. With `keep_native`, the best m4a/opus
+    stream is kept as-is instead of being re-encoded to mp3.
+    """
+
+    def __init__(self, outtmpl, max_parallel=2, keep_native=False):
+        # outtmpl is a yt-dlp template containing %(id)s and ending in .%(ext)s
+        self.outtmpl = outtmpl
+        self.keep_native = keep_native
+        self._semaphore = threading.Semaphore(max(1, max_parallel))
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def _get_ydl(self):
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            import yt_dlp
+
+            ydl_opts = {
+                'outtmpl': self.outtmpl,
+                'quiet': True,
+                'noplaylist': True,
+                'continuedl': True,
+            }
+            if self.keep_native:
+                # Gemini accepts these containers directly
+                ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio[acodec=opus]/bestaudio/best'
+            else:
+                ydl_opts['format'] = 'bestaudio/best'
+                ydl_opts['postprocessors'] = [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': 'mp3',
+                    'preferredquality': '128',
+                }]
+            ydl = yt_dlp.YoutubeDL(ydl_opts)
+            self._local.ydl = ydl
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def _path(self, video_id, ext):
+        return self.outtmpl.replace('%(id)s', video_id).replace('%(ext)s', ext)
+
+    def find_existing(self, video_id):
+        """
+        Returns the path of a completed download for the video, or None.
+        Only final files count: .part files and the .temp.mp3 of an interrupted
+        mp3 conversion don't, and native streams only with `keep_native`.
+        """
+        extensions = ('mp3',) + (NATIVE_AUDIO_EXTENSIONS if self.keep_native else ())
+        for ext in extensions:
+            path = self._path(video_id, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _convert_leftover(self, video_id):
+        """
+        Converts a native stream left behind by an interrupted mp3 conversion
+        (the download itself was complete) and returns the mp3 path, or None.
+        """
+        for ext in NATIVE_AUDIO_EXTENSIONS:
+            native_path = self._path(video_id, ext)
+            if not os.path.exists(native_path):
+                continue
+            mp3_path = self._path(video_id, 'mp3')
+            tmp_path = self._path(video_id, 'temp.mp3')
+            try:
+                print(f"Converting leftover {native_path} to mp3...")
+                audio.encode_mp3(native_path, tmp_path, '128k')
+                os.replace(tmp_path, mp3_path)
+                os.remove(native_path)
+                return mp3_path
+            except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"Could not convert {native_path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return None
+
+    def download(self, video_id):
+        """Downloads the audio of a video and returns the file path, or None on failure."""
+        existing = self.find_existing(video_id)
+        if existing:
+            return existing
+        if not self.keep_native:
+            converted = self._convert_leftover(video_id)
+            if converted:
+                return converted
+
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        with self._semaphore:
+            try:
+                ydl = self._get_ydl()
+                info = ydl.extract_info(video_url, download=True)
+                downloads = info.get('requested_downloads') or []
+                path = downloads[0].get('filepath') if downloads else None
+                if path and os.path.exists(path):
+                    return path
+                # Fall back to looking for the file (e.g. after post-processing)
+                return self.find_existing(video_id)
+            except Exception as e:
+                print(f"Error downloading audio for {video_id}: {e}")
+                return None
+
+    def close(self):
+        with self._lock:
+            for ydl in self._instances:
+                ydl.close()
+            self._instances = []
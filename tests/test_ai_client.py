@@ -0,0 +1,224 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta, timezone
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import ai
+
+class TestGeminiClient(unittest.TestCase):
+    def setUp(self):
+        self.config = {'ai_settings': {'model': 'gemini-test'}}
+
+    @patch('src.ai.genai')
+    def test_model_is_configured_once_and_cached(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.return_value = MagicMock(
+            text='```json\n{"summary": "S", "keywords": ["k"]}\n```'
+        )
+        client = ai.GeminiClient(api_key="fake")
+
+        first = ai.analyze_transcript("text one", "sys", "user", self.config, client)
+        ai.analyze_transcript("text two", "sys", "user", self.config, client)
+
+        self.assertEqual(first, {"summary": "S", "keywords": ["k"]})
+        mock_genai.configure.assert_called_once_with(api_key="fake")
+        mock_genai.GenerativeModel.assert_called_once_with('gemini-test')
+        self.assertEqual(client.stats['gemini-test']['calls'], 2)
+
+    @patch('src.ai.genai')
+    def test_missing_api_key_raises(self, mock_genai):
+        with patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                ai.analyze_transcript("text", "sys", "user", self.config, ai.GeminiClient())
+
+
+class TestRemoteFileReuse(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.audio_path = os.path.join(self.tmp.name, 'step2_upload_audio.mp3')
+        with open(self.audio_path, 'wb') as f:
+            f.write(b'audio')
+        self.config = {'ai_settings': {'model': 'm'}}
+
+    def remote_file(self, hours):
+        return MagicMock(expiration_time=datetime.now(timezone.utc) + timedelta(hours=hours),
+                         uri="https://files/abc")
+
+    @patch('src.ai.genai')
+    def test_upload_is_reused_after_failed_analysis(self, mock_genai):
+        uploaded = self.remote_file(48)
+        uploaded.name = "files/abc"
+        mock_genai.upload_file.return_value = uploaded
+        mock_genai.get_file.return_value = uploaded
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.side_effect = [
+            RuntimeError("invalid response"),
+            MagicMock(text='{"summary": "S", "keywords": []}'),
+        ]
+        client = ai.GeminiClient(api_key="fake")
+
+        failed = ai.analyze_audio(self.audio_path, "sys", "user", self.config, client)
+        result = ai.analyze_audio(self.audio_path, "sys", "user", self.config, client)
+
+        self.assertTrue(ai.is_failed_result(failed))
+        self.assertEqual(result['summary'], "S")
+        mock_genai.upload_file.assert_called_once_with(self.audio_path)
+        mock_genai.get_file.assert_called_once_with("files/abc")
+
+        client.cleanup_files()
+        mock_genai.delete_file.assert_called_once_with("files/abc")
+
+    @patch('src.ai.genai')
+    def test_expiring_upload_is_not_reused(self, mock_genai):
+        expiring = self.remote_file(0.5)
+        expiring.name = "files/old"
+        fresh = self.remote_file(48)
+        fresh.name = "files/new"
+        mock_genai.upload_file.side_effect = [expiring, fresh]
+        client = ai.GeminiClient(api_key="fake")
+
+        client.upload_file(self.audio_path)
+        self.assertIs(client.upload_file(self.audio_path), fresh)
+        mock_genai.get_file.assert_not_called()
+
+
+class TestProviderRouting(unittest.TestCase):
+    def setUp(self):
+        self.config = {'ai_settings': {'provider': 'gemini', 'model': 'gemini-default',
+                                       'providers': {'openai': {'max_concurrent': 1}}}}
+
+    def test_subscriptions_are_routed_by_provider_and_model(self):
+        pool = ai.ClientPool(self.config)
+
+        self.assertEqual(pool.route({}), ('google', 'gemini-default'))
+        self.assertEqual(pool.route({'provider': 'ChatGPT', 'model': 'gpt-x'}), ('openai', 'gpt-x'))
+        self.assertEqual(pool.route({'provider': 'claude'}),
+                         ('anthropic', ai.DEFAULT_PROVIDER_MODELS['anthropic']))
+        self.assertEqual(pool.route_audio('openai', 'gpt-x'), ('google', 'gemini-default'))
+        self.assertIs(pool.get('openai'), pool.get('openai'))
+        self.assertIsInstance(pool.get('anthropic'), ai.AnthropicClient)
+
+    def test_concurrency_adds_up_over_providers(self):
+        pool = ai.ClientPool(self.config)
+
+        self.assertEqual(pool.max_concurrent(['openai']), 1)
+        self.assertEqual(pool.max_concurrent(['openai', 'google', 'openai']), 1 + ai.DEFAULT_MAX_CONCURRENT)
+
+    def test_transcript_goes_to_routed_provider(self):
+        pool = ai.ClientPool(self.config)
+        mock_openai = MagicMock()
+        mock_openai.OpenAI.return_value.chat.completions.create.return_value.choices[0].message.content = (
+            '{"summary": "from openai", "keywords": []}'
+        )
+
+        with patch.dict(sys.modules, {'openai': mock_openai}), \
+             patch.dict(os.environ, {"OPENAI_API_KEY": "fake"}):
+            result = ai.analyze_transcript("text", "sys", "user", self.config, pool.get('openai'), model='gpt-x')
+
+        self.assertEqual(result['summary'], "from openai")
+        _, kwargs = mock_openai.OpenAI.return_value.chat.completions.create.call_args
+        self.assertEqual(kwargs['model'], 'gpt-x')
+        self.assertEqual(pool.get('openai').stats['gpt-x']['calls'], 1)
+
+
+class TestRetriesAndLimits(unittest.TestCase):
+    def setUp(self):
+        self.config = {'ai_settings': {'model': 'm'}}
+
+    @patch('src.ai.genai')
+    def test_rate_limit_errors_are_retried(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = [
+            RuntimeError("429 Resource has been exhausted (e.g. check quota)."),
+            MagicMock(text='{"summary": "S", "keywords": []}'),
+        ]
+        client = ai.GeminiClient(api_key="fake", limits={'retry_base_delay': 0.01})
+
+        result = ai.analyze_transcript("text", "sys", "user", self.config, client)
+
+        self.assertEqual(result, {"summary": "S", "keywords": []})
+        self.assertEqual(client.retries, 1)
+
+    @patch('src.ai.genai')
+    def test_persistent_failure_is_flagged(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = RuntimeError("429 quota")
+        client = ai.GeminiClient(api_key="fake", limits={'retry_base_delay': 0.001, 'max_retries': 2})
+
+        result = ai.analyze_transcript("text", "sys", "user", self.config, client)
+
+        self.assertTrue(ai.is_failed_result(result))
+        self.assertEqual(client.stats['m']['calls'], 3)
+        # Results saved by older versions are recognized as well
+        self.assertTrue(ai.is_failed_result({"summary": "AI Analysis failed: 429", "keywords": []}))
+        self.assertFalse(ai.is_failed_result({"summary": "A summary", "keywords": []}))
+
+    @patch('src.ai.genai')
+    def test_other_errors_are_not_retried(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = RuntimeError("invalid argument")
+        client = ai.GeminiClient(api_key="fake", limits={'retry_base_delay': 0.001})
+
+        ai.analyze_transcript("text", "sys", "user", self.config, client)
+
+        self.assertEqual(client.retries, 0)
+
+    def test_status_codes_are_matched_as_whole_numbers(self):
+        self.assertTrue(ai.is_retryable_error(RuntimeError("503 Internal server error")))
+        self.assertTrue(ai.is_retryable_error(RuntimeError("Error code: 502 - bad gateway")))
+        self.assertFalse(ai.is_retryable_error(RuntimeError("prompt has 1500000 tokens, max 1048576")))
+        self.assertFalse(ai.is_retryable_error(RuntimeError("keywords may have max 2500 chars")))
+
+    @patch('src.ai.genai')
+    def test_uploads_are_retried(self, mock_genai):
+        uploaded = MagicMock(expiration_time=None, uri="https://files/abc")
+        uploaded.name = "files/abc"
+        mock_genai.upload_file.side_effect = [RuntimeError("503 unavailable"), uploaded]
+        client = ai.GeminiClient(api_key="fake", limits={'retry_base_delay': 0.001})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'audio.mp3')
+            with open(path, 'wb') as f:
+                f.write(b'audio')
+
+            self.assertIs(client.upload_file(path), uploaded)
+
+        self.assertEqual(client.retries, 1)
+
+    def test_token_bucket_limits_requests(self):
+        bucket = ai.TokenBucket(per_minute=60)
+        now = bucket.updated
+
+        self.assertEqual(bucket.wait_time(60, now), 0.0)
+        bucket.take(60)
+        self.assertAlmostEqual(bucket.wait_time(1, now), 1.0)
+        self.assertAlmostEqual(bucket.wait_time(1, now + 1.0), 0.0)
+
+
+class TestChunkedAnalysis(unittest.TestCase):
+    def test_split_respects_budget_and_keeps_text(self):
+        text = "First sentence here. Second one! " + " ".join(["word"] * 200)
+        chunks = ai.split_transcript(text, max_tokens=20)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 20 * ai.CHARS_PER_TOKEN for c in chunks))
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    @patch('src.ai.genai')
+    def test_long_transcript_is_mapped_and_reduced(self, mock_genai):
+        def fake_generate(contents):
+            if "Merge these partial summaries" in contents:
+                return MagicMock(text='{"summary": "merged", "keywords": ["all"]}')
+            return MagicMock(text='{"summary": "part", "keywords": ["k"]}')
+
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = fake_generate
+        config = {'ai_settings': {'model': 'm', 'chunk_max_tokens': 50, 'chunk_parallelism': 2}}
+        client = ai.GeminiClient(api_key="fake")
+
+        result = ai.analyze_transcript("Some sentence. " * 100, "sys", "user", config, client)
+
+        self.assertEqual(result, {"summary": "merged", "keywords": ["all"]})
+        self.assertGreater(client.stats['m']['calls'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
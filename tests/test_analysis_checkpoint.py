@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+from src import storage
+
+class TestAnalysisCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(storage, 'DATA_DIR', self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        storage.set_backend(storage.FileSystemBackend())
+        self.addCleanup(storage.set_backend, storage.FileSystemBackend())
+        # The DB update is not part of these tests
+        patcher = patch.object(main, 'database')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.gen_conf = {'ai_settings': {'model': 'm'}}
+        self.clients = MagicMock()
+
+    def job(self, user_prompt):
+        return {'id': 'v1', 'title': 'T', 'transcript': 'text', 'user_prompt': user_prompt,
+                'provider': 'google', 'model': 'm'}
+
+    @patch('main.ai.analyze_transcript')
+    def test_checkpoint_is_reused_for_same_input(self, mock_analyze):
+        mock_analyze.return_value = {'summary': 'first', 'keywords': []}
+        main.step3_analyze(self.job('p1'), 's', self.gen_conf, self.clients, None)
+
+        job = main.step3_analyze(self.job('p1'), 's', self.gen_conf, self.clients, None)
+
+        self.assertEqual(mock_analyze.call_count, 1)
+        self.assertEqual(job['analysis']['summary'], 'first')
+
+    @patch('main.ai.analyze_transcript')
+    def test_changed_prompt_invalidates_checkpoint(self, mock_analyze):
+        mock_analyze.return_value = {'summary': 'first', 'keywords': []}
+        main.step3_analyze(self.job('p1'), 's', self.gen_conf, self.clients, None)
+
+        mock_analyze.return_value = {'summary': 'second', 'keywords': []}
+        job = main.step3_analyze(self.job('p2'), 's', self.gen_conf, self.clients, None)
+
+        self.assertEqual(mock_analyze.call_count, 2)
+        self.assertEqual(job['analysis']['summary'], 'second')
+        self.assertEqual(storage.load_step_json('v1', 'step3_analysis.json')['summary'], 'second')
+
+if __name__ == '__main__':
+    unittest.main()
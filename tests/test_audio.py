@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+import subprocess
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import audio
+
+class TestAudioPreprocessing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.input_path = os.path.join(self.tmp.name, 'in.m4a')
+        self.output_path = os.path.join(self.tmp.name, 'out.mp3')
+        with open(self.input_path, 'wb') as f:
+            f.write(b'x' * 1000)
+
+    def test_command_uses_configured_thresholds(self):
+        opts = {'audio_sample_rate': 8000, 'silence_threshold_db': -35, 'silence_min_duration': 0.5}
+        command = audio.build_ffmpeg_command(self.input_path, self.output_path, opts)
+
+        self.assertEqual(command[command.index('-ac') + 1], '1')
+        self.assertEqual(command[command.index('-ar') + 1], '8000')
+        self.assertIn('stop_duration=0.5:stop_threshold=-35dB', command[command.index('-af') + 1])
+
+    @patch('src.audio.shutil.which', return_value='/usr/bin/ffmpeg')
+    @patch('src.audio.subprocess.run')
+    def test_converted_file_is_used_and_reused(self, mock_run, _):
+        def fake_run(command, **kwargs):
+            with open(command[-1], 'wb') as f:
+                f.write(b'y' * 100)
+
+        mock_run.side_effect = fake_run
+
+        self.assertEqual(audio.preprocess_for_upload(self.input_path, self.output_path, {}), self.output_path)
+        self.assertEqual(audio.preprocess_for_upload(self.input_path, self.output_path, {}), self.output_path)
+        self.assertEqual(mock_run.call_count, 1)
+
+    @patch('src.audio.shutil.which', return_value='/usr/bin/ffmpeg')
+    @patch('src.audio.subprocess.run', side_effect=subprocess.CalledProcessError(1, 'ffmpeg'))
+    def test_failure_falls_back_to_original(self, *_):
+        self.assertEqual(audio.preprocess_for_upload(self.input_path, self.output_path, {}), self.input_path)
+        self.assertEqual(os.listdir(self.tmp.name), ['in.m4a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import MagicMock
+import json
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import batch
+
+class TestLocalBatch(unittest.TestCase):
+    def test_results_by_custom_id_without_failed_requests(self):
+        client = MagicMock()
+        def generate_text(model_name, prompt):
+            if prompt == 'bad':
+                raise RuntimeError("boom")
+            return f"{model_name}:{prompt}"
+        client.generate_text.side_effect = generate_text
+
+        endpoint = batch.create_batch('google', client, local_workers=2)
+        results = batch.submit_and_wait(endpoint, 'm', [('a', 'one'), ('b', 'bad'), ('c', 'two')], poll_interval=0)
+
+        self.assertEqual(results, {'a': 'm:one', 'c': 'm:two'})
+
+class TestSubmitAll(unittest.TestCase):
+    def test_all_batches_are_submitted_before_waiting(self):
+        calls = []
+        def endpoint(name, polls_until_done):
+            remote = MagicMock()
+            remote.submit.side_effect = lambda model_name, requests: calls.append(('submit', name)) or name
+            remote.is_done.side_effect = lambda batch_id: calls.append(('poll', name)) or \
+                sum(call == ('poll', name) for call in calls) >= polls_until_done
+            remote.results.side_effect = lambda batch_id: {batch_id: 'done'}
+            return remote
+
+        jobs = [(endpoint('slow', 3), 'm1', [('a', 'p')]), (endpoint('fast', 1), 'm2', [('b', 'p')])]
+        finished = list(batch.submit_all(jobs, poll_interval=0))
+
+        self.assertEqual(calls[:2], [('submit', 'slow'), ('submit', 'fast')])
+        self.assertEqual(finished, [(1, {'fast': 'done'}), (0, {'slow': 'done'})])
+
+class TestOpenAIBatch(unittest.TestCase):
+    def test_submits_jsonl_and_reads_output_file(self):
+        sdk = MagicMock()
+        client = MagicMock()
+        client.get_sdk_client.return_value = sdk
+        sdk.files.create.return_value.id = 'file-1'
+        sdk.batches.create.return_value.id = 'batch-1'
+        sdk.batches.retrieve.return_value.status = 'completed'
+        sdk.batches.retrieve.return_value.output_file_id = 'out-1'
+        ok = {"custom_id": "a", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "A"}}]}}}
+        error = {"custom_id": "b", "response": {"status_code": 500, "body": {}}}
+        sdk.files.content.return_value.text = json.dumps(ok) + "\n" + json.dumps(error) + "\n"
+
+        endpoint = batch.create_batch('openai', client)
+        results = batch.submit_and_wait(endpoint, 'gpt', [('a', 'p1'), ('b', 'p2')], poll_interval=0)
+
+        self.assertEqual(results, {'a': 'A'})
+        uploaded = sdk.files.create.call_args.kwargs['file'][1].getvalue().decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['custom_id'] for line in uploaded], ['a', 'b'])
+        self.assertEqual(sdk.batches.create.call_args.kwargs['input_file_id'], 'file-1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import cache
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(cache, 'CACHE_DIR', self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_hit_and_miss_counts(self):
+        c = cache.DiskCache('test', max_bytes=10000)
+        key = cache.hash_key('model', 'prompt', 'text')
+
+        self.assertIsNone(c.get(key))
+        c.put(key, {'summary': 'S'})
+
+        self.assertEqual(c.get(key), {'summary': 'S'})
+        self.assertEqual((c.hits, c.misses), (1, 1))
+        # Entries survive a new cache instance
+        self.assertEqual(cache.DiskCache('test', max_bytes=10000).get(key), {'summary': 'S'})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        c = cache.DiskCache('test', max_bytes=60)
+        c.put('a', 'x' * 20)
+        time.sleep(0.02)
+        c.put('b', 'y' * 20)
+        time.sleep(0.02)
+        c.get('a')
+        time.sleep(0.02)
+        c.put('c', 'z' * 20)
+
+        self.assertIsNotNone(c.get('a'))
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.evictions, 1)
+
+    def test_access_order_survives_restart(self):
+        c = cache.DiskCache('test', max_bytes=1000)
+        for i, key in enumerate(['a', 'b', 'c']):
+            c.put(key, 'x' * 20)
+            os.utime(c.path_for(key), (1000 + i, 1000 + i))
+        # 'a' was used last
+        os.utime(c.path_for('a'), (2000, 2000))
+
+        c = cache.DiskCache('test', max_bytes=50)
+        c.put('d', 'x' * 20)
+
+        self.assertEqual(sorted(os.listdir(c.directory)), ['a.json', 'd.json'])
+        self.assertEqual(c.evictions, 2)
+
+    def test_key_parts_do_not_run_together(self):
+        self.assertNotEqual(cache.hash_key('ab', 'c'), cache.hash_key('a', 'bc'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import database
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        database.close_connection()
+        patcher = patch.object(database, 'DB_NAME', os.path.join(self.tmp.name, 'test.db'))
+        patcher.start()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connection)
+        database.init_db()
+        database.upsert_channel("UC1", "Channel", "prompt")
+        database.add_video("v1", "UC1", "Title", "2024-01-01", 'new')
+
+    def test_connection_is_shared_and_in_wal_mode(self):
+        conn = database.get_connection()
+        self.assertIs(conn, database.get_connection())
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_get_video_statuses_in_bulk(self):
+        database.add_video("v2", "UC1", "Other", "2024-01-02", 'emailed')
+
+        statuses = database.get_video_statuses(["v1", "v2", "unknown"])
+
+        self.assertEqual(statuses, {"v1": 'new', "v2": 'emailed'})
+
+    def test_upload_history_keeps_newest_per_channel(self):
+        database.upsert_channel("UC2", "Other", "prompt")
+        for day in range(2, 6):
+            database.add_video(f"v{day}", "UC1", "Title", f"2024-01-0{day}", 'new')
+
+        history = database.get_upload_history(["UC1", "UC2"], limit=2)
+
+        self.assertEqual(sorted(history["UC1"]), ["2024-01-04", "2024-01-05"])
+        self.assertEqual(history["UC2"], [])
+
+    def test_add_keywords_skips_duplicates(self):
+        database.add_keywords("v1", ["ai", "python", "ai"])
+        database.add_keyword("v1", "python")
+
+        self.assertEqual(sorted(database.get_keywords_for_video("v1")), ["ai", "python"])
+
+    def test_search_ranks_title_matches_first(self):
+        database.add_video("v2", "UC1", "Rust compiler news", "2024-01-02", 'new')
+        database.index_video("v1", "Title", "A talk that mentions rust once.", ["talk"], "long transcript")
+        database.index_video("v2", "Rust compiler news", "Release notes.", ["rust"], "")
+
+        results = database.search_videos("rust")
+
+        self.assertEqual([r[0] for r in results], ["v2", "v1"])
+        self.assertEqual(results[0][2], "Channel")
+        # Invalid FTS syntax falls back to plain terms
+        self.assertEqual(database.search_videos("C++"), [])
+
+    def test_reindexing_replaces_entry(self):
+        database.index_video("v1", "Title", "old summary", [], "")
+        database.index_video("v1", "Title", "new summary", [], "")
+
+        self.assertEqual(database.search_videos("old"), [])
+        self.assertEqual(len(database.search_videos("summary")), 1)
+        count = database.get_connection().execute('SELECT COUNT(*) FROM videos_fts').fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_transcripts_of_archived_videos_are_backfilled_once(self):
+        # A database from before the search index
+        database.close_connection()
+        with patch.object(database, 'MIGRATIONS', database.MIGRATIONS[:2]), \
+                patch.object(database, 'DB_NAME', os.path.join(self.tmp.name, 'old.db')):
+            database.init_db()
+            database.upsert_channel("UC1", "Channel", "prompt")
+            database.add_video("v1", "UC1", "Physics talk", "2024-01-01", 'emailed')
+            database.add_video("v2", "UC1", "No transcript", "2024-01-02", 'emailed')
+            database.close_connection()
+        with patch.object(database, 'DB_NAME', os.path.join(self.tmp.name, 'old.db')):
+            database.init_db()
+            self.assertTrue(database.has_transcript_backfill())
+
+            transcripts = {"v1": "an introduction to quantum chromodynamics"}
+            added = database.backfill_transcripts(transcripts.get)
+
+            self.assertEqual(added, 1)
+            self.assertEqual([r[0] for r in database.search_videos("chromodynamics")], ["v1"])
+            self.assertFalse(database.has_transcript_backfill())
+
+            # Migrated rows are replaced, not duplicated, when a video is indexed again
+            database.index_video("v1", "Physics talk", "new summary", [], "quantum chromodynamics")
+            self.assertEqual(len(database.search_videos("chromodynamics")), 1)
+            database.close_connection()
+
+    def test_failed_transaction_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with database.transaction():
+                database.update_video_summary("v1", "summary")
+                database.update_video_status("v1", 'processed')
+                raise RuntimeError("boom")
+
+        row = database.get_video("v1")
+        self.assertIsNone(row[3])
+        self.assertEqual(row[4], 'new')
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'legacy.db')
+        database.close_connection()
+        patcher = patch.object(database, 'DB_NAME', self.db_path)
+        patcher.start()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connection)
+
+    def test_legacy_database_is_upgraded_in_place(self):
+        # Schema and data as written by the first version, including a duplicate keyword
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript('''
+            CREATE TABLE channels (id TEXT PRIMARY KEY, name TEXT, user_prompt TEXT);
+            CREATE TABLE videos (id TEXT PRIMARY KEY, channel_id TEXT, title TEXT,
+                                 summary TEXT, status TEXT, published_at TEXT);
+            CREATE TABLE keywords (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT, video_id TEXT);
+            INSERT INTO channels VALUES ('UC1', 'Channel', 'prompt');
+            INSERT INTO videos VALUES ('v1', 'UC1', 'Title', 'S', 'emailed', '2024-01-01');
+            INSERT INTO keywords (keyword, video_id) VALUES ('ai', 'v1'), ('ai', 'v1');
+        ''')
+        conn.commit()
+        conn.close()
+
+        database.init_db()
+
+        self.assertEqual(database.get_schema_version(), len(database.MIGRATIONS))
+        self.assertEqual(database.get_keywords_for_video("v1"), ["ai"])
+        self.assertEqual(database.get_video("v1")[4], 'emailed')
+        self.assertEqual(database.get_feed_cache()["UC1"], {'etag': None, 'modified': None})
+
+        indexes = {r[1] for r in database.get_connection().execute("PRAGMA index_list(keywords)")}
+        self.assertIn('idx_keywords_video_keyword', indexes)
+
+        # Running again is a no-op
+        database.init_db()
+
+
+if __name__ == '__main__':
+    unittest.main()
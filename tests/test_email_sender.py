@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import patch
+import email
+import socketserver
+import tempfile
+import threading
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import email_sender
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server: accepts AUTH and stores every message it receives."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith('AUTH'):
+                self.reply("235 ok")
+            elif command.startswith('RCPT') and 'REJECT' in command:
+                self.reply("550 no such user")
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply("250 ok")
+            elif command == 'DATA':
+                self.reply("354 go ahead")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line == b'.\r\n':
+                        break
+                    if data_line.startswith(b'..'):
+                        data_line = data_line[1:]
+                    lines.append(data_line)
+                self.server.messages.append(b''.join(lines))
+                self.reply("250 queued")
+            elif command == 'QUIT':
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+class TestSendEmail(unittest.TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.messages = []
+        self.server.connections = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.dict(os.environ, {'EMAIL_PASSWORD': 'secret'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def config(self, **settings):
+        email_settings = {
+            'host': '127.0.0.1', 'port': self.server.server_address[1],
+            'user': 'me@example.com', 'receiver': 'you@example.com', 'starttls': False
+        }
+        email_settings.update(settings)
+        return {'project_name': 'Briefing', 'email_settings': email_settings}
+
+    def item(self, i, audio_bytes=0):
+        audio_file = None
+        if audio_bytes:
+            audio_file = os.path.join(self.tmp.name, f"audio{i}.mp3")
+            with open(audio_file, 'wb') as f:
+                f.write(bytes(range(256)) * (audio_bytes // 256))
+        return {'channel': 'C', 'title': f"Video {i}", 'link': 'https://y', 'id': f"v{i}",
+                'summary': f"Summary {i}\n.leading dot", 'keywords': ['k'], 'audio_file': audio_file}
+
+    def test_single_message_with_attachment(self):
+        results = [self.item(1, audio_bytes=10240)]
+
+        self.assertTrue(email_sender.send_email(results, self.config()))
+
+        self.assertEqual(len(self.server.messages), 1)
+        msg = email.message_from_bytes(self.server.messages[0])
+        self.assertEqual(msg['Subject'].split(' - ')[0], 'Briefing')
+        html_part, audio_part = msg.get_payload()
+        self.assertIn('Video 1', html_part.get_payload(decode=True).decode('utf-8'))
+        with open(results[0]['audio_file'], 'rb') as f:
+            self.assertEqual(audio_part.get_payload(decode=True), f.read())
+        self.assertEqual(audio_part.get_filename(), 'audio1.mp3')
+
+    def test_large_report_is_split_over_one_session(self):
+        results = [self.item(i, audio_bytes=400 * 1024) for i in range(5)]
+        sent = []
+
+        # About two attachments fit into one digest
+        ok = email_sender.send_email(results, self.config(max_email_mb=1.2), on_sent=sent.append)
+
+        self.assertTrue(ok)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual([[item['id'] for item in items] for items in sent], [['v0', 'v1'], ['v2', 'v3'], ['v4']])
+        for number, raw in enumerate(self.server.messages, 1):
+            msg = email.message_from_bytes(raw)
+            self.assertTrue(msg['Subject'].endswith(f"({number}/3)"))
+            self.assertLess(len(raw), 1.2 * 1024 * 1024)
+
+    def test_rejected_digest_is_not_reported_as_sent(self):
+        sent = []
+        ok = email_sender.send_email([self.item(1)], self.config(receiver='reject@example.com'), on_sent=sent.append)
+
+        self.assertFalse(ok)
+        self.assertEqual(sent, [])
+        self.assertEqual(self.server.messages, [])
+
+class TestSplitDigests(unittest.TestCase):
+    def test_oversized_item_gets_its_own_digest(self):
+        items = [{'channel': 'C', 'title': 't', 'link': 'l', 'summary': 'x' * size} for size in (10, 5000, 10)]
+        digests = email_sender.split_digests(items, max_bytes=email_sender.MESSAGE_OVERHEAD + 2000)
+        self.assertEqual([len(d) for d in digests], [1, 1, 1])
+
+    def test_empty_report_is_one_digest(self):
+        self.assertEqual(email_sender.split_digests([], 1000), [[]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+
+class TestFeedFetching(unittest.TestCase):
+    def setUp(self):
+        self.subscriptions = [
+            {"channel_name": f"Channel {i}", "channel_id": f"UC{i}"}
+            for i in range(6)
+        ]
+
+    @patch('main.youtube')
+    def test_results_keep_subscription_order(self, mock_youtube):
+        def fake_get_new_videos(channel_id, limit=3):
+            # Earlier channels answer slower, so completion order is reversed
+            time.sleep(0.01 * (6 - int(channel_id[2:])))
+            return [{'id': f"{channel_id}_vid"}]
+
+        mock_youtube.get_new_videos.side_effect = fake_get_new_videos
+
+        results = main.fetch_all_feeds(self.subscriptions, limit=2, max_workers=4)
+
+        self.assertEqual([r[0]['id'] for r in results],
+                         [f"UC{i}_vid" for i in range(6)])
+        mock_youtube.get_new_videos.assert_any_call("UC0", limit=2)
+
+    @patch('main.youtube')
+    def test_failed_feed_returns_empty_list(self, mock_youtube):
+        def fake_get_new_videos(channel_id, limit=3):
+            if channel_id == "UC1":
+                raise ConnectionError("boom")
+            return [{'id': channel_id}]
+
+        mock_youtube.get_new_videos.side_effect = fake_get_new_videos
+
+        results = main.fetch_all_feeds(self.subscriptions[:3], limit=3, max_workers=2)
+
+        self.assertEqual(results[1], [])
+        self.assertEqual(results[2], [{'id': "UC2"}])
+
+    @patch('main.youtube')
+    def test_failed_feed_with_cache_counts_as_not_modified(self, mock_youtube):
+        mock_youtube.get_new_videos.side_effect = ConnectionError("boom")
+        feed_cache = {"UC0": {'etag': '"v1"', 'modified': None}}
+
+        results = main.fetch_all_feeds(self.subscriptions[:1], limit=3, max_workers=1, feed_cache=feed_cache)
+
+        self.assertEqual(results, [None])
+        self.assertEqual(feed_cache["UC0"], {'etag': '"v1"', 'modified': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
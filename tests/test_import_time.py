@@ -0,0 +1,38 @@
+import unittest
+import subprocess
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# SDKs that take up to seconds to import; they must only be loaded by the code that uses them
+HEAVY_MODULES = ('google.generativeai', 'openai', 'anthropic', 'gtts', 'feedparser',
+                 'youtube_transcript_api', 'yt_dlp')
+# Importing main took several seconds with the SDKs, well under 0.5s without them
+MAX_MAIN_IMPORT_SECONDS = 1.0
+
+def import_times(module):
+    """Imports `module` in a fresh interpreter and returns {module name: cumulative seconds}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+class TestImportTime(unittest.TestCase):
+    def test_main_does_not_import_sdks(self):
+        times = import_times('main')
+        loaded = [name for name in times
+                  if name in HEAVY_MODULES or name.startswith(tuple(m + '.' for m in HEAVY_MODULES))]
+        self.assertEqual(loaded, [])
+
+    def test_main_imports_fast(self):
+        seconds = import_times('main')['main']
+        self.assertLess(seconds, MAX_MAIN_IMPORT_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import pipeline
+
+class TestPipeline(unittest.TestCase):
+    def test_jobs_pass_all_stages_in_original_order(self):
+        def slow_first(job):
+            time.sleep(0.01 * (5 - job))
+            return job
+
+        stages = [
+            ('a', slow_first, 4),
+            ('b', lambda job: job * 10, 2),
+        ]
+
+        self.assertEqual(pipeline.run_pipeline(range(5), stages), [0, 10, 20, 30, 40])
+
+    def test_dropped_and_failed_jobs_are_removed(self):
+        def drop_odd(job):
+            return None if job % 2 else job
+
+        def fail_on_two(job):
+            if job == 2:
+                raise RuntimeError("boom")
+            return job
+
+        stages = [('drop', drop_odd, 2), ('fail', fail_on_two, 1)]
+
+        self.assertEqual(pipeline.run_pipeline(range(6), stages), [0, 4])
+
+    def test_stage_concurrency_is_limited(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def tracked(job):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            return job
+
+        pipeline.run_pipeline(range(10), [('limited', tracked, 3)])
+
+        self.assertLessEqual(peak, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import random
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import sqlite3
+import main
+from src import scheduler
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+def uploads(every, count, last_ago=timedelta(0)):
+    return [(NOW - last_ago - every * i).isoformat() for i in range(count)]
+
+class TestPollInterval(unittest.TestCase):
+    def test_active_channel_is_polled_within_minutes(self):
+        interval = scheduler.poll_interval(uploads(timedelta(hours=1), 10), NOW)
+        self.assertEqual(interval, 6 * 60)
+
+    def test_quiet_channel_is_polled_rarely(self):
+        interval = scheduler.poll_interval(uploads(timedelta(days=365), 3), NOW)
+        self.assertEqual(interval, scheduler.DEFAULT_MAX_INTERVAL)
+
+    def test_channel_that_went_quiet_backs_off(self):
+        active = scheduler.poll_interval(uploads(timedelta(hours=1), 10), NOW)
+        stopped = scheduler.poll_interval(uploads(timedelta(hours=1), 10, last_ago=timedelta(days=2)), NOW)
+        self.assertGreater(stopped, active * 10)
+
+    def test_minimum_interval_and_unknown_history(self):
+        self.assertEqual(scheduler.poll_interval(uploads(timedelta(minutes=1), 10), NOW), scheduler.DEFAULT_MIN_INTERVAL)
+        self.assertEqual(scheduler.poll_interval([None, 'garbage'], NOW), scheduler.DEFAULT_INTERVAL)
+
+    def test_naive_dates_are_treated_as_utc(self):
+        history = ['2024-05-30T12:00:00', (NOW - timedelta(days=1)).isoformat()]
+        self.assertEqual(scheduler.poll_interval(history, NOW), 24 * 3600 / scheduler.POLLS_PER_UPLOAD)
+
+class TestScheduler(unittest.TestCase):
+    def test_channels_are_due_on_their_own_schedule(self):
+        schedule = scheduler.Scheduler(jitter=0)
+        schedule.add("active")
+        schedule.add("quiet")
+        now = NOW.timestamp()
+
+        self.assertEqual(schedule.due(now), ["active", "quiet"])
+        self.assertEqual(schedule.due(now), [])
+
+        schedule.reschedule("active", uploads(timedelta(hours=1), 10), now)
+        schedule.reschedule("quiet", uploads(timedelta(days=30), 3), now)
+
+        self.assertEqual(schedule.next_time(), now + 6 * 60)
+        self.assertEqual(schedule.due(now + 10 * 60), ["active"])
+        self.assertEqual(schedule.due(now + 2 * 24 * 3600), ["quiet"])
+
+    def test_jitter_spreads_polls(self):
+        schedule = scheduler.Scheduler(jitter=0.1, rng=random.Random(1))
+        history = uploads(timedelta(hours=1), 10)
+        for i in range(20):
+            schedule.add(f"c{i}")
+            schedule.due(0)
+            schedule.reschedule(f"c{i}", history, NOW.timestamp())
+
+        offsets = [when - NOW.timestamp() for when in schedule.next_poll.values()]
+        self.assertTrue(all(6 * 60 * 0.9 <= offset <= 6 * 60 * 1.1 for offset in offsets))
+        self.assertGreater(len(set(offsets)), 1)
+
+class TestDaemon(unittest.TestCase):
+    def run_daemon(self, subscriptions, sleeps=2):
+        """Runs the daemon loop until it has slept `sleeps` times; returns the sleep durations."""
+        slept = []
+        def sleep(seconds):
+            slept.append(seconds)
+            if len(slept) >= sleeps:
+                raise KeyboardInterrupt
+        gen_conf = {'working_options': {'daemon_min_interval_minutes': 1, 'daemon_max_interval_hours': 2}}
+        with patch.object(main, 'init_run'), patch.object(main, 'close_run'), \
+                patch.object(main, 'database') as self.database, \
+                patch.object(main, 'run_cycle') as self.run_cycle, \
+                patch.object(main.time, 'sleep', side_effect=sleep):
+            self.database.get_feed_cache.return_value = {}
+            self.database.get_upload_history.side_effect = sqlite3.OperationalError("database is locked")
+            with self.assertRaises(KeyboardInterrupt):
+                main.run_daemon(gen_conf, {'subscriptions': subscriptions})
+        return slept
+
+    def test_without_subscriptions_the_daemon_waits(self):
+        self.assertEqual(self.run_daemon([]), [2 * 3600, 2 * 3600])
+
+    def test_channels_stay_scheduled_when_the_history_fails(self):
+        slept = self.run_daemon([{'channel_id': 'UC1'}])
+
+        self.run_cycle.assert_called_once()
+        # Rescheduled with the default interval
+        self.assertAlmostEqual(slept[0], scheduler.DEFAULT_INTERVAL, delta=scheduler.DEFAULT_INTERVAL * 0.11)
+
+if __name__ == '__main__':
+    unittest.main()
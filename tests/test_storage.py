@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import importlib.util
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import storage
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'data')
+        patcher = patch.object(storage, 'DATA_DIR', self.data_dir)
+        patcher.start()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(patcher.stop)
+        self.addCleanup(storage.set_backend, storage.get_backend())
+
+class TestBackends(StorageTestCase):
+    def check_round_trip(self):
+        storage.save_step_json("vid", "step1_metadata.json", {"title": "Ä"})
+        storage.save_step_text("vid", "step2_transcript.txt", "hello world")
+
+        self.assertEqual(storage.load_step_json("vid", "step1_metadata.json"), {"title": "Ä"})
+        self.assertEqual(storage.load_step_text("vid", "step2_transcript.txt"), "hello world")
+        self.assertIsNone(storage.load_step_text("vid", "missing.txt"))
+
+    def test_file_backend(self):
+        storage.set_backend(storage.FileSystemBackend())
+        self.check_round_trip()
+        # Reads don't create folders
+        storage.load_step_json("other", "step1_metadata.json")
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "other")))
+
+    def test_sqlite_backend(self):
+        backend = storage.SQLiteBlobBackend()
+        self.addCleanup(backend.close)
+        storage.set_backend(backend)
+        self.check_round_trip()
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "vid")))
+
+class TestCompression(StorageTestCase):
+    def test_gzip_backend(self):
+        storage.set_backend(storage.FileSystemBackend('gzip'))
+        storage.save_step_text("vid", "step2_transcript.txt", "hello " * 1000)
+
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, "vid")), ["step2_transcript.txt.gz"])
+        self.assertEqual(storage.load_step_text("vid", "step2_transcript.txt"), "hello " * 1000)
+
+    def test_configured_backend_is_uncompressed_by_default(self):
+        storage.set_backend(storage.create_backend({}))
+        storage.save_step_text("vid", "step2_transcript.txt", "hello")
+
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, "vid")), ["step2_transcript.txt"])
+
+    def test_plain_files_stay_readable_and_can_be_compressed(self):
+        storage.set_backend(storage.FileSystemBackend())
+        storage.save_step_json("vid", "step3_analysis.json", {"summary": "S"})
+
+        storage.set_backend(storage.FileSystemBackend('gzip'))
+        self.assertEqual(storage.load_step_json("vid", "step3_analysis.json"), {"summary": "S"})
+
+        self.assertEqual(storage.compress_existing('gzip'), 1)
+        self.assertEqual(storage.compress_existing('gzip'), 0)
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, "vid")), ["step3_analysis.json.gz"])
+        self.assertEqual(storage.load_step_json("vid", "step3_analysis.json"), {"summary": "S"})
+
+class TestCrashSafety(StorageTestCase):
+    def test_truncated_artifact_is_quarantined(self):
+        for backend in (storage.FileSystemBackend('gzip'), storage.FileSystemBackend()):
+            self.check_quarantine(backend)
+
+    @unittest.skipUnless(importlib.util.find_spec('zstandard'), "zstandard is not installed")
+    def test_truncated_zstd_artifact_is_quarantined(self):
+        self.check_quarantine(storage.FileSystemBackend('zstd'))
+
+    def check_quarantine(self, backend):
+        storage.set_backend(backend)
+        storage.save_step_json("vid", "step3_analysis.json", {"summary": "S" * 100})
+        path = os.path.join(self.data_dir, "vid", os.listdir(os.path.join(self.data_dir, "vid"))[0])
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        self.assertIsNone(storage.load_step_json("vid", "step3_analysis.json"))
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(any(".corrupt-" in name for name in os.listdir(os.path.join(self.data_dir, "vid"))))
+
+        # The step can be redone and saved again
+        storage.save_step_json("vid", "step3_analysis.json", {"summary": "new"})
+        self.assertEqual(storage.load_step_json("vid", "step3_analysis.json"), {"summary": "new"})
+        storage.flush()
+        for name in os.listdir(os.path.join(self.data_dir, "vid")):
+            os.remove(os.path.join(self.data_dir, "vid", name))
+
+    def test_failed_write_keeps_old_content(self):
+        storage.set_backend(storage.FileSystemBackend(fsync='always'))
+        storage.save_step_text("vid", "step2_transcript.txt", "old")
+
+        with patch('src.storage.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                storage.save_step_text("vid", "step2_transcript.txt", "new")
+
+        self.assertEqual(storage.load_step_text("vid", "step2_transcript.txt"), "old")
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, "vid")), ["step2_transcript.txt"])
+
+class TestMigration(StorageTestCase):
+    def test_step_files_are_moved_and_audio_stays(self):
+        storage.set_backend(storage.FileSystemBackend())
+        storage.save_step_json("vid", "step3_analysis.json", {"summary": "S"})
+        audio_path = storage.get_file_path("vid", "step4_audio.mp3")
+        with open(audio_path, 'wb') as f:
+            f.write(b"mp3")
+
+        target = storage.SQLiteBlobBackend()
+        self.addCleanup(target.close)
+        self.assertEqual(storage.migrate_to_blob_store(target), 1)
+
+        storage.set_backend(target)
+        self.assertEqual(storage.load_step_json("vid", "step3_analysis.json"), {"summary": "S"})
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, "vid")), ["step4_audio.mp3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
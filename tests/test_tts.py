@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import cache, tts
+
+def fake_gtts(text, lang, slow):
+    class Fake:
+        def save(self, filepath):
+            with open(filepath, 'wb') as f:
+                f.write(f"{lang}:{text}".encode('utf-8'))
+    return Fake()
+
+class TestAudioGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(cache, 'CACHE_DIR', os.path.join(self.tmp.name, 'cache'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    @patch('gtts.gTTS', side_effect=fake_gtts)
+    def test_identical_text_is_synthesized_once(self, mock_gtts):
+        speech = tts.AudioGenerator('de', tts.create_audio_cache({}))
+        first = os.path.join(self.tmp.name, 'a.mp3')
+        second = os.path.join(self.tmp.name, 'b.mp3')
+
+        self.assertTrue(speech.generate("**Hallo** Welt", first))
+        # Same text after cleaning
+        self.assertTrue(speech.generate("Hallo Welt", second))
+
+        self.assertEqual(mock_gtts.call_count, 1)
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), b"de:Hallo Welt")
+        self.assertEqual((speech.cache.hits, speech.cache.misses, speech.synthesized), (1, 1, 1))
+
+    @patch('gtts.gTTS', side_effect=fake_gtts)
+    def test_language_is_part_of_the_key(self, mock_gtts):
+        audio_cache = tts.create_audio_cache({})
+        tts.AudioGenerator('de', audio_cache).generate("Text", os.path.join(self.tmp.name, 'de.mp3'))
+        tts.AudioGenerator('en', audio_cache).generate("Text", os.path.join(self.tmp.name, 'en.mp3'))
+
+        self.assertEqual(mock_gtts.call_count, 2)
+
+    @patch('gtts.gTTS', side_effect=RuntimeError("quota"))
+    def test_failure_is_not_cached(self, mock_gtts):
+        speech = tts.AudioGenerator('de', tts.create_audio_cache({}))
+        path = os.path.join(self.tmp.name, 'a.mp3')
+
+        self.assertFalse(speech.generate("Text", path))
+        self.assertFalse(speech.generate("Text", path))
+        self.assertEqual(mock_gtts.call_count, 2)
+
+class TestSegments(unittest.TestCase):
+    def test_sentences_are_merged_up_to_the_limit(self):
+        text = "Eins. Zwei ist hier. Drei!\nVier?"
+        self.assertEqual(tts.split_sentences(text, max_chars=20), ["Eins. Zwei ist hier.", "Drei! Vier?"])
+
+    def test_long_sentence_is_split_at_whitespace(self):
+        segments = tts.split_sentences("aaaa bbbb cccc dddd", max_chars=10)
+        self.assertEqual(segments, ["aaaa bbbb", "cccc dddd"])
+
+    @patch('gtts.gTTS', side_effect=fake_gtts)
+    def test_parallel_segments_are_joined_in_order(self, mock_gtts):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.mp3')
+            with patch.object(tts, 'SEGMENT_MAX_CHARS', 15), ThreadPoolExecutor(4) as executor:
+                text = "Erster Satz. Zweiter Satz. Dritter Satz."
+                self.assertTrue(tts.generate_audio_summary(text, path, 'de', executor=executor))
+
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b"de:Erster Satz.de:Zweiter Satz.de:Dritter Satz.")
+            # Segment files are cleaned up
+            self.assertEqual(os.listdir(tmp), ['out.mp3'])
+
+    def test_only_offline_engines_use_worker_processes(self):
+        online = tts.AudioGenerator('de', engine='gtts', processes=4)
+        offline = tts.AudioGenerator('de', engine='espeak', processes=2)
+        self.addCleanup(offline.close)
+
+        self.assertIsNone(online._get_executor())
+        self.assertIsNotNone(offline._get_executor())
+
+    def test_offline_engine_wav_segments_are_encoded_once(self):
+        def fake_run(command, check, capture_output):
+            path = command[command.index('-w') + 1]
+            with wave.open(path, 'wb') as f:
+                f.setparams((1, 2, 16000, 0, 'NONE', 'not compressed'))
+                f.writeframes(b'\x01\x00' * 100)
+
+        def fake_encode(input_path, output_path):
+            with wave.open(input_path, 'rb') as f:
+                frames = f.getnframes()
+            with open(output_path, 'w') as f:
+                f.write(str(frames))
+
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch('src.tts.shutil.which', return_value='/usr/bin/espeak-ng'), \
+             patch('src.tts.subprocess.run', side_effect=fake_run) as mock_run, \
+             patch('src.audio.encode_mp3', side_effect=fake_encode) as mock_encode, \
+             patch.object(tts, 'SEGMENT_MAX_CHARS', 5):
+            path = os.path.join(tmp, 'out.mp3')
+            engine = tts.create_engine('espeak')
+            self.assertTrue(tts.generate_audio_summary("Eins.\nZwei.", path, 'de', engine))
+
+            with open(path) as f:
+                self.assertEqual(f.read(), "200")
+            self.assertEqual(mock_encode.call_count, 1)
+            self.assertEqual(mock_run.call_args.args[0][:3], ['espeak-ng', '-v', 'de'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import youtube
+
+class TestDownloadManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.outtmpl = os.path.join(self.tmp.name, '%(id)s', 'step2_fallback_audio.%(ext)s')
+        self.mock_yt_dlp = MagicMock()
+        patcher = patch.dict(sys.modules, {'yt_dlp': self.mock_yt_dlp})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_extract_info(self, url, download=True):
+        video_id = url.rsplit('=', 1)[1]
+        path = self.outtmpl.replace('%(id)s', video_id).replace('%(ext)s', 'm4a')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'audio')
+        return {'requested_downloads': [{'filepath': path}]}
+
+    def test_instance_is_reused_and_native_stream_kept(self):
+        self.mock_yt_dlp.YoutubeDL.return_value.extract_info.side_effect = self.fake_extract_info
+        manager = youtube.DownloadManager(self.outtmpl, max_parallel=2, keep_native=True)
+
+        first = manager.download("vid1")
+        second = manager.download("vid2")
+        manager.close()
+
+        self.assertTrue(first.endswith(os.path.join("vid1", "step2_fallback_audio.m4a")))
+        self.assertTrue(os.path.exists(second))
+        self.assertEqual(self.mock_yt_dlp.YoutubeDL.call_count, 1)
+        opts = self.mock_yt_dlp.YoutubeDL.call_args[0][0]
+        self.assertNotIn('postprocessors', opts)
+        self.assertTrue(opts['continuedl'])
+
+    def test_partial_download_is_not_treated_as_complete(self):
+        folder = os.path.join(self.tmp.name, 'vid1')
+        os.makedirs(folder)
+        open(os.path.join(folder, 'step2_fallback_audio.webm.part'), 'wb').close()
+        manager = youtube.DownloadManager(self.outtmpl)
+
+        self.assertIsNone(manager.find_existing('vid1'))
+
+        open(os.path.join(folder, 'step2_fallback_audio.mp3'), 'wb').close()
+        self.assertTrue(manager.find_existing('vid1').endswith('.mp3'))
+
+    def test_interrupted_conversion_is_finished_instead_of_reused(self):
+        folder = os.path.join(self.tmp.name, 'vid1')
+        os.makedirs(folder)
+        for name in ('step2_fallback_audio.temp.mp3', 'step2_fallback_audio.webm'):
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(b'audio')
+        manager = youtube.DownloadManager(self.outtmpl)
+
+        self.assertIsNone(manager.find_existing('vid1'))
+
+        def fake_encode(input_path, output_path, bitrate):
+            with open(output_path, 'wb') as f:
+                f.write(b'mp3')
+
+        with patch('src.audio.encode_mp3', side_effect=fake_encode) as mock_encode:
+            path = manager.download('vid1')
+
+        self.assertTrue(path.endswith('step2_fallback_audio.mp3'))
+        self.assertTrue(mock_encode.call_args[0][0].endswith('.webm'))
+        self.assertEqual(sorted(os.listdir(folder)), ['step2_fallback_audio.mp3'])
+        self.mock_yt_dlp.YoutubeDL.assert_not_called()
+
+    def test_native_stream_only_counts_with_keep_native(self):
+        folder = os.path.join(self.tmp.name, 'vid1')
+        os.makedirs(folder)
+        open(os.path.join(folder, 'step2_fallback_audio.webm'), 'wb').close()
+
+        self.assertIsNone(youtube.DownloadManager(self.outtmpl).find_existing('vid1'))
+        self.assertTrue(youtube.DownloadManager(self.outtmpl, keep_native=True).find_existing('vid1').endswith('.webm'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import youtube
+
+class TestYoutubeFeedCache(unittest.TestCase):
+    @patch('feedparser.parse')
+    def test_conditional_request_updates_cache(self, mock_parse):
+        entry = MagicMock(yt_videoid="abc", title="Title", link="http://x", published="2024-01-01")
+        feed = MagicMock(status=200, etag='"v1"', modified="Mon, 01 Jan 2024 00:00:00 GMT", entries=[entry])
+        mock_parse.return_value = feed
+
+        cache = {'etag': '"v0"', 'modified': None}
+        videos = youtube.get_new_videos("UC1", limit=3, cache=cache)
+
+        self.assertEqual(videos[0]['id'], "abc")
+        self.assertEqual(cache, {'etag': '"v1"', 'modified': "Mon, 01 Jan 2024 00:00:00 GMT"})
+        _, kwargs = mock_parse.call_args
+        self.assertEqual(kwargs['etag'], '"v0"')
+
+    @patch('feedparser.parse')
+    def test_not_modified_returns_none(self, mock_parse):
+        mock_parse.return_value = MagicMock(status=304, entries=[])
+
+        cache = {'etag': '"v1"', 'modified': None}
+        self.assertIsNone(youtube.get_new_videos("UC1", cache=cache))
+        self.assertEqual(cache['etag'], '"v1"')
+
+    @patch('feedparser.parse')
+    def test_failed_request_keeps_cache(self, mock_parse):
+        # feedparser reports network errors without a status
+        mock_parse.return_value = MagicMock(spec=['bozo_exception', 'entries'],
+                                            bozo_exception=OSError("DNS failure"), entries=[])
+
+        cache = {'etag': '"v1"', 'modified': "Mon, 01 Jan 2024 00:00:00 GMT"}
+        with self.assertRaises(ConnectionError):
+            youtube.get_new_videos("UC1", cache=cache)
+        self.assertEqual(cache, {'etag': '"v1"', 'modified': "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+
+if __name__ == '__main__':
+    unittest.main()
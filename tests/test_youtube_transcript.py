@@ -0,0 +1,36 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import youtube
+
+class TestTranscriptSegments(unittest.TestCase):
+    @patch('src.youtube._fetch_transcript')
+    def test_segments_are_kept_as_parallel_arrays(self, mock_fetch):
+        mock_fetch.return_value = ('en', [
+            {'text': 'Hello', 'start': 0.0, 'duration': 1.5},
+            {'text': 'world again', 'start': 1.5, 'duration': 2.25},
+        ])
+
+        result = youtube.get_video_transcript_segments("vid", ['en'])
+
+        self.assertEqual(result['text'], "Hello world again")
+        self.assertEqual(result['language'], 'en')
+        self.assertEqual(result['start'], [0.0, 1.5])
+        self.assertEqual(result['duration'], [1.5, 2.25])
+        # Offsets point at the segment text inside the joined transcript
+        self.assertEqual(result['text'][result['offset'][1]:], "world again")
+        mock_fetch.assert_called_once_with("vid", ['en'])
+
+    @patch('src.youtube._fetch_transcript')
+    def test_default_languages_and_plain_text(self, mock_fetch):
+        mock_fetch.return_value = ('de', [{'text': 'Hallo', 'start': 0.0, 'duration': 1.0}])
+
+        self.assertEqual(youtube.get_video_transcript("vid"), "Hallo")
+        mock_fetch.assert_called_once_with("vid", ['de', 'en'])
+
+
+if __name__ == '__main__':
+    unittest.main()